@@ -7,15 +7,26 @@ based on various column filters.
 
 from __future__ import annotations
 
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Any, Mapping, Union
 from pydantic import BaseModel, Field
 from enum import Enum
 from agents import function_tool
 from utils.db.connection import get_db_connection
+from tools.filters import (
+    FilterError, cache_response, clamp_limit, get_cached_response, parse_filters, response_cache_key
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns the tool can filter on; anything else is rejected before it reaches the SQL
+VALID_COLUMNS = frozenset({
+    'app_identifier', 'app_name', 'app_version', 'app_guid',
+    'install_timestamp', 'last_launched_timestamp',
+    'decoding_status', 'is_emulatable', 'operation_mode',
+    'deleted_state', 'decoding_confidence'
+})
+
 
 class QueryType(str, Enum):
     """Type of query being executed."""
@@ -55,8 +66,8 @@ class AppRecord(BaseModel):
         }
 
     @classmethod
-    def from_db_row(cls, row: Dict[str, Any]) -> "AppRecord":
-        """Create AppRecord from database row."""
+    def from_db_row(cls, row: Mapping[str, Any]) -> "AppRecord":
+        """Create AppRecord from a database row (an asyncpg Record or a dict)."""
         return cls(
             app_identifier=row.get('app_identifier'),
             app_name=row.get('app_name'),
@@ -291,6 +302,7 @@ async def query_apps(
 
     Special handling:
     - If value is "all" (e.g., "app_name:all"), returns all unique values for that column
+      (it must then be the only filter)
     - Multiple filters are combined with AND logic
     - Results are limited to prevent overwhelming responses
 
@@ -338,89 +350,33 @@ Input Parameters:
     print(log_message)  # Print to console
     logger.info(log_message)  # Log to file
 
-    try:
-        # Parse column filters
-        filters = []
-        for col_filter in [col1, col2, col3]:
-            if col_filter:
-                filters.append(col_filter)
+    limit = clamp_limit(limit)
+    cache_key = response_cache_key('query_apps', col1, col2, col3, limit)
+    cached = get_cached_response(cache_key)
+    if cached is not None:
+        return cached
 
-        if not filters:
+    try:
+        # Parse and validate the column filters
+        try:
+            filters, all_column = parse_filters((col1, col2, col3), VALID_COLUMNS)
+        except FilterError as e:
             result = AppFilterResult(
                 success=False,
                 total_count=0,
                 returned_count=0,
-                query_description="No filters provided",
+                query_description=e.description,
                 filters_applied=[],
                 apps=[],
-                error_message="At least col1 must be provided"
+                error_message=str(e)
             )
             return result.to_summary()
 
-        # Parse each filter
-        filter_conditions = []
-        filter_params = []
-        query_parts = []
-        param_idx = 1
-
-        # Check if this is a "get all values" query
-        is_all_query = False
-        all_column = None
-
-        for filter_str in filters:
-            if ':' not in filter_str:
-                result = AppFilterResult(
-                    success=False,
-                    total_count=0,
-                    returned_count=0,
-                    query_description=f"Invalid filter format: {filter_str}",
-                    filters_applied=[],
-                    apps=[],
-                    error_message=f"Filter must be in format 'column:value', got '{filter_str}'"
-                )
-                return result.to_summary()
-
-            column, value = filter_str.split(':', 1)
-            column = column.strip()
-            value = value.strip()
-
-            # Validate column name (prevent SQL injection)
-            valid_columns = {
-                'app_identifier', 'app_name', 'app_version', 'app_guid',
-                'install_timestamp', 'last_launched_timestamp',
-                'decoding_status', 'is_emulatable', 'operation_mode',
-                'deleted_state', 'decoding_confidence'
-            }
-
-            if column not in valid_columns:
-                result = AppFilterResult(
-                    success=False,
-                    total_count=0,
-                    returned_count=0,
-                    query_description=f"Invalid column: {column}",
-                    filters_applied=[],
-                    apps=[],
-                    error_message=f"Column '{column}' is not valid. Valid columns: {', '.join(sorted(valid_columns))}"
-                )
-                return result.to_summary()
-
-            # Handle "all" special value
-            if value.lower() == 'all':
-                is_all_query = True
-                all_column = column
-                break
-
-            # Add filter condition
-            filter_conditions.append(f"{column} = ${param_idx}")
-            filter_params.append(value)
-            query_parts.append(f"{column}={value}")
-            param_idx += 1
-
-        # Limit validation
-        if limit > 1000:
-            limit = 1000
-        elif limit < 1:
-            limit = 100
+        is_all_query = all_column is not None
+        filter_conditions = [f"{column} = ${i}" for i, (column, _) in enumerate(filters, 1)]
+        filter_params = [value for _, value in filters]
+        query_parts = [f"{column}={value}" for column, value in filters]
+        param_idx = len(filters) + 1
 
         async with get_db_connection() as conn:
             if is_all_query:
@@ -462,6 +418,7 @@ Output length: {len(output)} characters
 """
                 print(success_msg)
                 logger.info(success_msg)
+                cache_response(cache_key, output, aggregate=True)
                 return output
 
             else:
@@ -492,7 +449,7 @@ Output length: {len(output)} characters
                 rows = await conn.fetch(query, *filter_params)
 
                 # Convert to AppRecord objects
-                apps = [AppRecord.from_db_row(dict(row)) for row in rows]
+                apps = [AppRecord.from_db_row(row) for row in rows]
 
                 result = AppFilterResult(
                     success=True,
@@ -513,6 +470,7 @@ Output length: {len(output)} characters
 """
                 print(success_msg)
                 logger.info(success_msg)
+                cache_response(cache_key, output)
                 return output
 
     except Exception as e:
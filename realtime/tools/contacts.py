@@ -7,15 +7,24 @@ based on various column filters.
 
 from __future__ import annotations
 
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Any, Mapping, Union
 from pydantic import BaseModel, Field
 from enum import Enum
 from agents import function_tool
 from utils.db.connection import get_db_connection
+from tools.filters import (
+    FilterError, cache_response, clamp_limit, get_cached_response, parse_filters, response_cache_key
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns the tool can filter on; anything else is rejected before it reaches the SQL
+VALID_COLUMNS = frozenset({
+    'source_app', 'contact_type', 'contact_group',
+    'deleted_state', 'decoding_confidence'
+})
+
 
 class QueryType(str, Enum):
     """Type of query being executed."""
@@ -47,8 +56,8 @@ class ContactRecord(BaseModel):
         }
 
     @classmethod
-    def from_db_row(cls, row: Dict[str, Any]) -> "ContactRecord":
-        """Create ContactRecord from database row."""
+    def from_db_row(cls, row: Mapping[str, Any]) -> "ContactRecord":
+        """Create ContactRecord from a database row (an asyncpg Record or a dict)."""
         return cls(
             name=row.get('name'),
             source_app=row.get('source_app'),
@@ -270,6 +279,7 @@ async def query_contacts(
 
     Special handling:
     - If value is "all" (e.g., "source_app:all"), returns all unique values for that column
+      (it must then be the only filter)
     - Multiple filters are combined with AND logic
     - Results are limited to prevent overwhelming responses
 
@@ -313,87 +323,33 @@ Input Parameters:
     print(log_message)  # Print to console
     logger.info(log_message)  # Log to file
 
-    try:
-        # Parse column filters
-        filters = []
-        for col_filter in [col1, col2, col3]:
-            if col_filter:
-                filters.append(col_filter)
+    limit = clamp_limit(limit)
+    cache_key = response_cache_key('query_contacts', col1, col2, col3, limit)
+    cached = get_cached_response(cache_key)
+    if cached is not None:
+        return cached
 
-        if not filters:
+    try:
+        # Parse and validate the column filters
+        try:
+            filters, all_column = parse_filters((col1, col2, col3), VALID_COLUMNS)
+        except FilterError as e:
             result = ContactFilterResult(
                 success=False,
                 total_count=0,
                 returned_count=0,
-                query_description="No filters provided",
+                query_description=e.description,
                 filters_applied=[],
                 contacts=[],
-                error_message="At least col1 must be provided"
+                error_message=str(e)
             )
             return result.to_summary()
 
-        # Parse each filter
-        filter_conditions = []
-        filter_params = []
-        query_parts = []
-        param_idx = 1
-
-        # Check if this is a "get all values" query
-        is_all_query = False
-        all_column = None
-
-        for filter_str in filters:
-            if ':' not in filter_str:
-                result = ContactFilterResult(
-                    success=False,
-                    total_count=0,
-                    returned_count=0,
-                    query_description=f"Invalid filter format: {filter_str}",
-                    filters_applied=[],
-                    contacts=[],
-                    error_message=f"Filter must be in format 'column:value', got '{filter_str}'"
-                )
-                return result.to_summary()
-
-            column, value = filter_str.split(':', 1)
-            column = column.strip()
-            value = value.strip()
-
-            # Validate column name (prevent SQL injection)
-            valid_columns = {
-                'source_app', 'contact_type', 'contact_group',
-                'deleted_state', 'decoding_confidence'
-            }
-
-            if column not in valid_columns:
-                result = ContactFilterResult(
-                    success=False,
-                    total_count=0,
-                    returned_count=0,
-                    query_description=f"Invalid column: {column}",
-                    filters_applied=[],
-                    contacts=[],
-                    error_message=f"Column '{column}' is not valid. Valid columns: {', '.join(sorted(valid_columns))}"
-                )
-                return result.to_summary()
-
-            # Handle "all" special value
-            if value.lower() == 'all':
-                is_all_query = True
-                all_column = column
-                break
-
-            # Add filter condition
-            filter_conditions.append(f"{column} = ${param_idx}")
-            filter_params.append(value)
-            query_parts.append(f"{column}={value}")
-            param_idx += 1
-
-        # Limit validation
-        if limit > 1000:
-            limit = 1000
-        elif limit < 1:
-            limit = 100
+        is_all_query = all_column is not None
+        filter_conditions = [f"{column} = ${i}" for i, (column, _) in enumerate(filters, 1)]
+        filter_params = [value for _, value in filters]
+        query_parts = [f"{column}={value}" for column, value in filters]
+        param_idx = len(filters) + 1
 
         async with get_db_connection() as conn:
             if is_all_query:
@@ -435,6 +391,7 @@ Output length: {len(output)} characters
 """
                 print(success_msg)
                 logger.info(success_msg)
+                cache_response(cache_key, output, aggregate=True)
                 return output
 
             else:
@@ -462,7 +419,7 @@ Output length: {len(output)} characters
                 rows = await conn.fetch(query, *filter_params)
 
                 # Convert to ContactRecord objects
-                contacts = [ContactRecord.from_db_row(dict(row)) for row in rows]
+                contacts = [ContactRecord.from_db_row(row) for row in rows]
 
                 result = ContactFilterResult(
                     success=True,
@@ -483,6 +440,7 @@ Output length: {len(output)} characters
 """
                 print(success_msg)
                 logger.info(success_msg)
+                cache_response(cache_key, output)
                 return output
 
     except Exception as e:
@@ -0,0 +1,137 @@
+"""
+Helpers shared by the agent tools for handling "column:value" filters.
+"""
+
+from typing import AbstractSet, Hashable, List, Optional, Sequence, Tuple
+
+from utils.cache import TTLCache
+
+# Rows a tool returns when no valid limit is given, and the most it returns
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# Tool output by tool name, normalized filters and limit; the TTL bounds
+# staleness while uploads add rows
+_response_cache = TTLCache(maxsize=4096, ttl=60)
+
+# Output of ':all' queries, kept apart so a burst of filtered calls cannot evict
+# it. These scan the whole table across uploads, which grows batch by batch while
+# an extraction streams in, so the TTL is kept short
+_aggregate_cache = TTLCache(maxsize=256, ttl=30)
+
+
+def normalize_filters(*col_filters: Optional[str]) -> Tuple[str, ...]:
+    """
+    Canonical form of a tool's col1/col2/col3 filters, for use as a cache key.
+
+    Unset filters are dropped, whitespace around the column and value is
+    removed and the filters are sorted, since they are combined with AND
+    (an ":all" filter must stand alone). Values keep their case because the
+    tools match them exactly.
+    """
+    normalized = []
+    for col_filter in col_filters:
+        if not col_filter:
+            continue
+        column, sep, value = col_filter.partition(':')
+        normalized.append(f"{column.strip()}{sep}{value.strip()}")
+    return tuple(sorted(normalized))
+
+
+def clamp_limit(limit: int) -> int:
+    """Cap limit at MAX_LIMIT, falling back to DEFAULT_LIMIT if it is below 1."""
+    if limit > MAX_LIMIT:
+        return MAX_LIMIT
+    if limit < 1:
+        return DEFAULT_LIMIT
+    return limit
+
+
+def response_cache_key(
+    tool_name: str,
+    col1: Optional[str],
+    col2: Optional[str],
+    col3: Optional[str],
+    limit: int
+) -> Hashable:
+    """Key of a tool call in the response cache; calls with equal keys return the same output."""
+    return (tool_name, normalize_filters(col1, col2, col3), clamp_limit(limit))
+
+
+def get_cached_response(key: Hashable) -> Optional[str]:
+    """Return the cached output for a response_cache_key, or None."""
+    cached = _aggregate_cache.get(key)
+    return cached if cached is not None else _response_cache.get(key)
+
+
+def cache_response(key: Hashable, output: str, aggregate: bool = False):
+    """Cache the output of a successful tool call under its response_cache_key.
+
+    aggregate marks the output of a ':all' query.
+    """
+    (_aggregate_cache if aggregate else _response_cache).set(key, output)
+
+
+class FilterError(ValueError):
+    """A tool's column filters could not be parsed or are not allowed."""
+
+    def __init__(self, description: str, message: str):
+        super().__init__(message)
+        self.description = description
+
+
+def parse_filters(
+    col_filters: Sequence[Optional[str]],
+    valid_columns: AbstractSet[str]
+) -> Tuple[List[Tuple[str, str]], Optional[str]]:
+    """
+    Parse a tool's col1/col2/col3 filters in "column:value" form.
+
+    Returns the (column, value) pairs to match and, for a "column:all"
+    query, the column whose values should be listed (otherwise None). An
+    ":all" filter lists every value of its column, so it must be the only
+    filter.
+
+    Raises:
+        FilterError: If no filter is given, a filter is not "column:value",
+            a column is not in valid_columns (which also keeps column names
+            out of the SQL unless known) or ":all" is combined with another
+            filter. description is a short summary for the tool result.
+    """
+    col_filters = [col_filter for col_filter in col_filters if col_filter]
+    if not col_filters:
+        raise FilterError("No filters provided", "At least col1 must be provided")
+
+    filters = []
+    all_column = None
+
+    for filter_str in col_filters:
+        if ':' not in filter_str:
+            raise FilterError(
+                f"Invalid filter format: {filter_str}",
+                f"Filter must be in format 'column:value', got '{filter_str}'"
+            )
+
+        column, value = filter_str.split(':', 1)
+        column = column.strip()
+        value = value.strip()
+
+        if column not in valid_columns:
+            raise FilterError(
+                f"Invalid column: {column}",
+                f"Column '{column}' is not valid. Valid columns: {', '.join(sorted(valid_columns))}"
+            )
+
+        if value.lower() == 'all':
+            all_column = column
+        else:
+            filters.append((column, value))
+
+    if all_column is not None and len(col_filters) > 1:
+        raise FilterError(
+            f"Invalid ':all' query: {', '.join(col_filters)}",
+            "A 'column:all' filter lists every value of that column, so it must be "
+            "the only filter. Use it in col1 and leave col2 and col3 empty."
+        )
+
+    return filters, all_column
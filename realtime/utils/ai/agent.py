@@ -1,21 +1,46 @@
 from __future__ import annotations
 
 import os
-from typing import Optional, List
+from typing import Dict, FrozenSet, List, Optional, Tuple
 from dotenv import load_dotenv
 
 from agents import Agent, Runner
 from agents.extensions.models.litellm_model import LitellmModel
-from utils.prompts.Forensic_agent import forensic_agent_instructions
-from tools.location import location_tool
-from tools.apps import app_tool
-from tools.call_logs import call_log_tool
-from tools.messages import message_tool
-from tools.browsing_history import browsing_history_tool
-from tools.contacts import contact_tool
+from utils.prompts.Forensic_agent import get_forensic_agent_instructions
+from utils.ai.routing import normalize_query, select_tools, try_direct_route
+from utils.cache import TTLCache
+from tools.location import location_tool, query_locations
+from tools.apps import app_tool, query_apps
+from tools.call_logs import call_log_tool, query_call_logs
+from tools.messages import message_tool, query_messages
+from tools.browsing_history import browsing_history_tool, query_browsing_history
+from tools.contacts import contact_tool, query_contacts
 
 load_dotenv()
 
+# Shared agent instance, created by create_forensic_agent on first use
+_forensic_agent: Optional["ForensicAgent"] = None
+
+# Answer plain listing queries ("Show deleted WhatsApp calls"), and queries
+# shaped like one of the tool guides' Query Examples, with the tool output
+# directly instead of an agent report. Off unless enabled.
+DIRECT_TOOL_ROUTING = os.getenv("DIRECT_TOOL_ROUTING", "false").lower() in ("1", "true", "yes")
+
+# Tool functions reachable through direct routing, by tool name
+_DIRECT_TOOLS = {
+    'query_locations': query_locations,
+    'query_apps': query_apps,
+    'query_call_logs': query_call_logs,
+    'query_messages': query_messages,
+    'query_browsing_history': query_browsing_history,
+    'query_contacts': query_contacts,
+}
+
+# Final answers to first-turn queries, keyed by normalized query and tool subset.
+# The TTL bounds how stale an answer can get while uploads add new data.
+_response_cache = TTLCache(maxsize=512, ttl=300)
+
+
 class ForensicAgent:
     def __init__(self):
         """
@@ -43,11 +68,17 @@ class ForensicAgent:
 
         self.agent = Agent(
             name="ForensicAnalyst",
-            instructions=forensic_agent_instructions,
+            instructions=get_forensic_agent_instructions(),
             model=LitellmModel(model=self.model, api_key=self.api_key),
             tools=[location_tool, app_tool, call_log_tool, message_tool, browsing_history_tool, contact_tool],
         )
 
+        # Variants of the agent with trimmed instructions, keyed by answer
+        # format and the tools whose usage guides they carry
+        self._agent_variants: Dict[Tuple[str, Optional[FrozenSet[str]]], Agent] = {
+            ('full', None): self.agent
+        }
+
         # Debug: Verify tools were added
         print(f"Agent created with {len(self.agent.tools) if hasattr(self.agent, 'tools') else 'unknown'} tools")
         print("=" * 80)
@@ -72,6 +103,13 @@ class ForensicAgent:
         if data_chunks is None:
             data_chunks = []
 
+        # A plain listing query maps to one tool call with obvious filters,
+        # so it can skip the model round-trip
+        if DIRECT_TOOL_ROUTING and not chat_history:
+            route = try_direct_route(user_query)
+            if route is not None:
+                return await _DIRECT_TOOLS[route.tool_name](*route.filters)
+
         # Build a structured prompt so chat history is actually used
         sections: List[str] = []
         if chat_history:
@@ -84,15 +122,64 @@ class ForensicAgent:
 
         query_with_context = "\n\n".join(sections)
 
-        result = await Runner.run(self.agent, query_with_context)
+        # Follow-up turns already show the report format in the chat history,
+        # so they get the shorter format section
+        answer_format = 'brief' if chat_history else 'full'
+        tool_subset = select_tools(user_query)
+
+        # Answers to follow-up turns depend on the chat history, so only
+        # first-turn queries are served from the cache
+        cache_key = None
+        if not chat_history:
+            cache_key = (normalize_query(user_query), tool_subset, len(data_chunks))
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        agent = self._get_agent_variant(answer_format, tool_subset)
+        result = await Runner.run(agent, query_with_context)
+
+        if cache_key is not None:
+            _response_cache.set(cache_key, result.final_output)
         return result.final_output
 
+    def _get_agent_variant(
+        self,
+        answer_format: str,
+        tool_subset: Optional[FrozenSet[str]]
+    ) -> Agent:
+        """
+        Get the agent whose instructions use answer_format and only carry the
+        usage guides of the tools in tool_subset (all tools if None).
+
+        Every variant keeps all tools registered, so a query the keyword
+        routing under-selects for can still call any tool.
+        """
+        key = (answer_format, tool_subset)
+        agent = self._agent_variants.get(key)
+
+        if agent is None:
+            agent = self.agent.clone(
+                instructions=get_forensic_agent_instructions(answer_format, tool_subset)
+            )
+            self._agent_variants[key] = agent
+
+        return agent
+
 
 async def create_forensic_agent() -> ForensicAgent:
     """
-    Factory function to create a ForensicAgent instance.
+    Get the process-wide ForensicAgent, creating it on first use.
+
+    The agent holds no per-request state, so its model client and built
+    instructions are reused across requests instead of rebuilt each time.
 
     Returns:
         Configured ForensicAgent instance
     """
-    return ForensicAgent()
+    global _forensic_agent
+
+    if _forensic_agent is None:
+        _forensic_agent = ForensicAgent()
+
+    return _forensic_agent
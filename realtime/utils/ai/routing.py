@@ -0,0 +1,310 @@
+"""
+Keyword routing of investigator queries to the agent tools they need.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, NamedTuple, Optional, Sequence, Tuple
+
+from utils.prompts.Forensic_agent import TOOL_PROMPTS
+
+# Word patterns that mark a query as needing a tool
+TOOL_KEYWORDS = {
+    'query_locations': re.compile(
+        r'\b(locat\w*|gps|coordinates?|latitude|longitude|address(es)?|where|places?|visited)\b',
+        re.IGNORECASE
+    ),
+    'query_apps': re.compile(
+        r'\b(apps?|applications?|installed|packages?|software)\b',
+        re.IGNORECASE
+    ),
+    'query_call_logs': re.compile(
+        r'\b(calls?|called|calling|caller|dial\w*|missed|incoming|outgoing)\b',
+        re.IGNORECASE
+    ),
+    'query_messages': re.compile(
+        r'\b(messages?|messaged|messaging|sms|mms|chats?|texts?|texted|attachments?)\b',
+        re.IGNORECASE
+    ),
+    'query_browsing_history': re.compile(
+        r'\b(brows\w*|websites?|urls?|searche[sd]|bookmarks?|chrome|firefox|safari|web)\b',
+        re.IGNORECASE
+    ),
+    'query_contacts': re.compile(
+        r'\b(contacts?|phone ?book|address book)\b',
+        re.IGNORECASE
+    ),
+}
+
+
+def select_tools(query: str) -> Optional[FrozenSet[str]]:
+    """
+    Pick the tools a query needs by keyword.
+
+    Returns the names of the tools whose keywords appear in the query, or
+    None when no keyword matches and the query should get every tool.
+    """
+    selected = frozenset(
+        name for name, pattern in TOOL_KEYWORDS.items() if pattern.search(query)
+    )
+    return selected or None
+
+
+class DirectRoute(NamedTuple):
+    """A tool call that answers a query without going through the agent."""
+    tool_name: str
+    filters: Tuple[str, ...]
+
+
+# Filters shared by every tool
+_COMMON_MODIFIERS = {
+    'deleted': 'deleted_state:Deleted',
+    'intact': 'deleted_state:Intact',
+    'high confidence': 'decoding_confidence:High',
+    'medium confidence': 'decoding_confidence:Medium',
+    'low confidence': 'decoding_confidence:Low',
+}
+
+_SOURCE_APP_MODIFIERS = {
+    'whatsapp': 'source_app:WhatsApp',
+    'telegram': 'source_app:Telegram',
+    'skype': 'source_app:Skype',
+    'viber': 'source_app:Viber',
+    'instagram': 'source_app:Instagram',
+    'facebook': 'source_app:Facebook',
+}
+
+# Words allowed before the noun of a query, per tool, with the filter each adds
+_TOOL_MODIFIERS: Dict[str, Dict[str, str]] = {
+    'query_apps': {
+        **_COMMON_MODIFIERS,
+        'whatsapp': 'app_name:WhatsApp Messenger',
+        'instagram': 'app_identifier:com.instagram.android',
+    },
+    'query_call_logs': {
+        **_COMMON_MODIFIERS,
+        **_SOURCE_APP_MODIFIERS,
+        'missed': 'status:Missed',
+        'incoming': 'direction:Incoming',
+        'outgoing': 'direction:Outgoing',
+        'video': 'is_video_call:true',
+    },
+    'query_messages': {
+        **_COMMON_MODIFIERS,
+        **_SOURCE_APP_MODIFIERS,
+        'sms': 'message_type:SMS',
+    },
+    'query_contacts': {
+        **_COMMON_MODIFIERS,
+        **_SOURCE_APP_MODIFIERS,
+        'phone book': 'contact_type:PhoneBook',
+    },
+    'query_locations': {
+        **_COMMON_MODIFIERS,
+        **_SOURCE_APP_MODIFIERS,
+        'google maps': 'source_app:Google Maps',
+        'shared': 'location_type:Shared',
+    },
+    'query_browsing_history': {
+        **_COMMON_MODIFIERS,
+        'chrome': 'source_browser:Chrome',
+        'firefox': 'source_browser:Firefox',
+    },
+}
+
+# Nouns that end a query, with the tool they name and any filter they imply
+_NOUNS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    'apps': ('query_apps', ()),
+    'applications': ('query_apps', ()),
+    'calls': ('query_call_logs', ()),
+    'call logs': ('query_call_logs', ()),
+    'messages': ('query_messages', ()),
+    'messages with attachments': ('query_messages', ('has_attachments:true',)),
+    'contacts': ('query_contacts', ()),
+    'locations': ('query_locations', ()),
+    'history': ('query_browsing_history', ()),
+    'browsing history': ('query_browsing_history', ()),
+    'search history': ('query_browsing_history', ('entry_type:search',)),
+    'searches': ('query_browsing_history', ('entry_type:search',)),
+    'bookmarks': ('query_browsing_history', ('entry_type:bookmark',)),
+}
+
+# Whole queries that ask for every value of one column
+_AGGREGATE_QUERIES = {
+    'what apps are installed': DirectRoute('query_apps', ('app_name:all',)),
+    'what apps have call logs': DirectRoute('query_call_logs', ('source_app:all',)),
+    'what apps have calls': DirectRoute('query_call_logs', ('source_app:all',)),
+    'what apps have messages': DirectRoute('query_messages', ('source_app:all',)),
+    'what apps have contacts': DirectRoute('query_contacts', ('source_app:all',)),
+    'what browsers have history': DirectRoute('query_browsing_history', ('source_browser:all',)),
+    'what cities have location data': DirectRoute('query_locations', ('city:all',)),
+}
+
+# Words that name an entity, by the placeholder that replaces them in a
+# query skeleton, with the value the tools store for them
+_SKELETON_ENTITIES: Dict[str, Dict[str, str]] = {
+    '<APP>': {
+        'whatsapp': 'WhatsApp',
+        'telegram': 'Telegram',
+        'skype': 'Skype',
+        'viber': 'Viber',
+        'instagram': 'Instagram',
+        'facebook': 'Facebook',
+    },
+    '<BROWSER>': {
+        'chrome': 'Chrome',
+        'firefox': 'Firefox',
+        'safari': 'Safari',
+    },
+}
+
+# A numbered Query Examples entry of a tool guide:
+# 1. "Show all WhatsApp calls"
+#    → `query_call_logs(col1="source_app:WhatsApp")`
+_QUERY_EXAMPLE = re.compile(r'^\d+\. "(?P<query>[^"]+)"\n\s*→ `(?P<tool>\w+)\((?P<args>[^`]*)\)`$', re.MULTILINE)
+
+_LISTING_PREFIX = re.compile(r'^(?:show|list|get|find|display)(?: me)?(?: all)?(?: the)? ')
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase query, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r'\s+', ' ', query).strip().lower().rstrip('?!. ')
+
+
+def skeletonize(query: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    Reduce a query to its skeleton by replacing entity words with placeholders.
+
+    "Show all Telegram calls" becomes ("show all <APP> calls",
+    {'<APP>': 'Telegram'}). Returns None when one kind of entity appears
+    twice, since the placeholders could not tell them apart.
+    """
+    entities: Dict[str, str] = {}
+    words = []
+
+    for word in normalize_query(query).split():
+        for placeholder, values in _SKELETON_ENTITIES.items():
+            if word in values:
+                if placeholder in entities:
+                    return None
+                entities[placeholder] = values[word]
+                word = placeholder
+                break
+        words.append(word)
+
+    return ' '.join(words), entities
+
+
+def _template_route(query: str, tool_name: str, filters: Sequence[str]) -> Optional[Tuple[str, DirectRoute]]:
+    """
+    Turn a query and the tool call that answers it into a skeleton route.
+
+    Filter values equal to one of the query's entities are stored as the
+    entity's placeholder. Returns None unless every entity of the query
+    ends up as a placeholder, so a query with another entity cannot reuse
+    a value that belonged to this one (e.g. "WhatsApp" -> "WhatsApp
+    Messenger").
+    """
+    skeleton = skeletonize(query)
+    if skeleton is None or not filters:
+        return None
+    text, entities = skeleton
+    placeholders = {value: placeholder for placeholder, value in entities.items()}
+
+    templated = []
+    for col_filter in filters:
+        column, sep, value = col_filter.partition(':')
+        templated.append(f"{column}{sep}{placeholders.get(value, value)}")
+
+    used = {placeholder for placeholder in entities if any(f.endswith(':' + placeholder) for f in templated)}
+    if used != set(entities):
+        return None
+
+    return text, DirectRoute(tool_name, tuple(templated))
+
+
+@lru_cache(maxsize=None)
+def _skeleton_routes() -> Dict[str, DirectRoute]:
+    """Skeleton routes seeded from the Query Examples of every tool guide."""
+    routes = {}
+    for prompt in TOOL_PROMPTS.values():
+        for example in _QUERY_EXAMPLE.finditer(prompt):
+            filters = re.findall(r'col\d="([^"]*)"', example['args'])
+            templated = _template_route(example['query'], example['tool'], filters)
+            if templated is not None:
+                text, route = templated
+                routes.setdefault(text, route)
+    return routes
+
+
+def _route_from_skeleton(query: str) -> Optional[DirectRoute]:
+    """Fill in the seeded tool call for the skeleton of query, if any."""
+    skeleton = skeletonize(query)
+    if skeleton is None:
+        return None
+    text, entities = skeleton
+
+    route = _skeleton_routes().get(text)
+    if route is None:
+        return None
+
+    filters = []
+    for col_filter in route.filters:
+        column, sep, value = col_filter.partition(':')
+        filters.append(f"{column}{sep}{entities.get(value, value)}")
+    return DirectRoute(route.tool_name, tuple(filters))
+
+
+def try_direct_route(query: str) -> Optional[DirectRoute]:
+    """
+    Map a plain listing query straight to one tool call.
+
+    Only queries made entirely of known words are routed: an optional verb
+    ("show all"), filter words ("deleted WhatsApp") and a noun naming the
+    data ("calls"), e.g. "Show deleted Telegram calls", or one of the fixed
+    questions such as "What apps are installed?". Anything else returns
+    None and should go to the agent.
+
+    Queries with the skeleton of one of the tool guides' Query Examples
+    ("Show deleted <APP> messages") are routed as well, with their own
+    entities filled in.
+    """
+    text = normalize_query(query)
+
+    route = _AGGREGATE_QUERIES.get(text) or _route_from_skeleton(query)
+    if route is not None:
+        return route
+
+    match = _LISTING_PREFIX.match(text + ' ')
+    if not match:
+        return None
+    text = text[match.end():]
+
+    for noun in sorted(_NOUNS, key=len, reverse=True):
+        if text == noun or text.endswith(' ' + noun):
+            tool_name, filters = _NOUNS[noun]
+            words = text[:-len(noun)].split()
+            break
+    else:
+        return None
+
+    modifiers = _TOOL_MODIFIERS[tool_name]
+    filters = list(filters)
+    i = 0
+    while i < len(words):
+        # Two-word modifiers ("high confidence") take precedence
+        pair = ' '.join(words[i:i + 2])
+        if pair in modifiers:
+            filters.append(modifiers[pair])
+            i += 2
+        elif words[i] in modifiers:
+            filters.append(modifiers[words[i]])
+            i += 1
+        else:
+            return None
+
+    columns = [f.split(':', 1)[0] for f in filters]
+    if not filters or len(filters) > 3 or len(set(columns)) != len(columns):
+        return None
+
+    return DirectRoute(tool_name, tuple(filters))
@@ -9,6 +9,7 @@ from .connection import (
 
 from .operations import (
     save_feedback,
+    save_feedback_batch,
     get_feedback_by_session,
     get_feedback_by_email
 )
@@ -19,6 +20,7 @@ __all__ = [
     'get_db_pool',
     'get_db_connection',
     'save_feedback',
+    'save_feedback_batch',
     'get_feedback_by_session',
     'get_feedback_by_email'
 ]
@@ -5,27 +5,57 @@ This module provides async functions to interact with the installed_apps tables.
 """
 
 import asyncpg
-import os
-import json
 from typing import List, Dict, Any, Optional
 import logging
+from datetime import datetime
 from .connection import get_db_connection, get_db_pool
+from .helpers import load_schema_sql, multi_values_insert
 
 logger = logging.getLogger(__name__)
 
+# Column order of the records built in bulk_insert_apps
+_APP_COLUMNS = (
+    'upload_id', 'app_identifier', 'app_name', 'app_version', 'app_guid',
+    'install_timestamp', 'install_timestamp_dt',
+    'last_launched_timestamp', 'last_launched_dt',
+    'decoding_status', 'is_emulatable', 'operation_mode',
+    'deleted_state', 'decoding_confidence',
+    'permissions', 'categories', 'associated_directory_paths',
+    'raw_xml', 'raw_json',
+)
 
-async def init_apps_schema():
-    """Initialize the installed apps database schema."""
-    schema_path = os.path.join(
-        os.path.dirname(__file__),
-        'installed_apps_schema.sql'
-    )
+# Record positions overwritten when an app is upserted again
+_APP_UPDATED_FIELDS = (2, 3, 5, 6)  # app_name, app_version, install_timestamp, install_timestamp_dt
+
+
+def _fold_duplicate_apps(records: List[tuple]) -> List[tuple]:
+    """
+    Merge records that share an app_identifier into one.
 
-    if not os.path.exists(schema_path):
-        raise FileNotFoundError(f"Schema file not found: {schema_path}")
+    Mirrors row-by-row upserts: the first record is kept and later ones only
+    overwrite the columns the ON CONFLICT clause updates.
+    """
+    folded = []
+    positions = {}
+
+    for record in records:
+        pos = positions.get(record[1])
+
+        if pos is None:
+            positions[record[1]] = len(folded)
+            folded.append(record)
+        else:
+            merged = list(folded[pos])
+            for i in _APP_UPDATED_FIELDS:
+                merged[i] = record[i]
+            folded[pos] = tuple(merged)
 
-    with open(schema_path, 'r') as f:
-        schema_sql = f.read()
+    return folded
+
+
+async def init_apps_schema():
+    """Initialize the installed apps database schema."""
+    schema_sql = load_schema_sql('apps_schema.sql')
 
     async with get_db_connection() as conn:
         await conn.execute(schema_sql)
@@ -69,34 +99,17 @@ async def update_app_extraction_status(
         processed_apps: Number of apps processed so far
         error_message: Error message if failed
     """
+    # Fields left as None keep their current value
     async with get_db_connection() as conn:
-        # Build update query dynamically
-        updates = ["extraction_status = $2", "updated_at = CURRENT_TIMESTAMP"]
-        params = [upload_id, status]
-        param_idx = 3
-
-        if total_apps is not None:
-            updates.append(f"total_apps = ${param_idx}")
-            params.append(total_apps)
-            param_idx += 1
-
-        if processed_apps is not None:
-            updates.append(f"processed_apps = ${param_idx}")
-            params.append(processed_apps)
-            param_idx += 1
-
-        if error_message is not None:
-            updates.append(f"error_message = ${param_idx}")
-            params.append(error_message)
-            param_idx += 1
-
-        query = f"""
+        await conn.execute("""
             UPDATE app_extractions
-            SET {', '.join(updates)}
+            SET extraction_status = $2,
+                total_apps = COALESCE($3, total_apps),
+                processed_apps = COALESCE($4, processed_apps),
+                error_message = COALESCE($5, error_message),
+                updated_at = CURRENT_TIMESTAMP
             WHERE upload_id = $1
-        """
-
-        await conn.execute(query, *params)
+        """, upload_id, status, total_apps, processed_apps, error_message)
 
     logger.info(f"Updated app extraction status for {upload_id}: {status}")
 
@@ -113,115 +126,113 @@ async def bulk_insert_apps(upload_id: str, apps: List[Dict[str, Any]]):
         return
 
     async with get_db_connection() as conn:
-        # Prepare data for bulk insert
-        records = []
-        permission_records = []
-        category_records = []
-
-        for app in apps:
-            # Convert timestamps to datetime strings if they're integers
-            install_dt = None
-            if app.get('install_timestamp'):
-                from datetime import datetime
-                install_dt = datetime.fromtimestamp(app['install_timestamp'] / 1000)
-
-            last_launched_dt = None
-            if app.get('last_launched_timestamp'):
-                from datetime import datetime
-                last_launched_dt = datetime.fromtimestamp(app['last_launched_timestamp'] / 1000)
-
-            # Prepare main app record
-            record = (
-                upload_id,
-                app.get('app_identifier'),
-                app.get('app_name'),
-                app.get('app_version'),
-                app.get('app_guid'),
-                app.get('install_timestamp'),
-                install_dt,
-                app.get('last_launched_timestamp'),
-                last_launched_dt,
-                app.get('decoding_status'),
-                app.get('is_emulatable', False),
-                app.get('operation_mode'),
-                app.get('deleted_state'),
-                app.get('decoding_confidence'),
-                json.dumps(app.get('permissions', [])),  # JSONB
-                json.dumps(app.get('categories', [])),  # JSONB
-                json.dumps(app.get('associated_directory_paths', [])),  # JSONB
-                app.get('raw_xml'),
-                json.dumps(app),  # raw_json
+        # Insert apps, permissions and categories atomically
+        async with conn.transaction():
+            # Prepare data for bulk insert
+            records = []
+            permission_records = []
+            category_records = []
+
+            for app in apps:
+                # Convert timestamps to datetime strings if they're integers
+                install_dt = None
+                if app.get('install_timestamp'):
+                    install_dt = datetime.fromtimestamp(app['install_timestamp'] / 1000)
+
+                last_launched_dt = None
+                if app.get('last_launched_timestamp'):
+                    last_launched_dt = datetime.fromtimestamp(app['last_launched_timestamp'] / 1000)
+
+                # Prepare main app record
+                record = (
+                    upload_id,
+                    app.get('app_identifier'),
+                    app.get('app_name'),
+                    app.get('app_version'),
+                    app.get('app_guid'),
+                    app.get('install_timestamp'),
+                    install_dt,
+                    app.get('last_launched_timestamp'),
+                    last_launched_dt,
+                    app.get('decoding_status'),
+                    app.get('is_emulatable', False),
+                    app.get('operation_mode'),
+                    app.get('deleted_state'),
+                    app.get('decoding_confidence'),
+                    # JSONB columns are serialized by the connection's jsonb codec (orjson)
+                    app.get('permissions', []),
+                    app.get('categories', []),
+                    app.get('associated_directory_paths', []),
+                    app.get('raw_xml'),
+                    app,  # raw_json
+                )
+                records.append(record)
+
+            # Insert apps with multi-row upserts (COPY can't express ON CONFLICT);
+            # RETURNING hands back the id of every inserted or updated app
+            app_ids = await multi_values_insert(
+                conn,
+                'installed_apps',
+                _APP_COLUMNS,
+                _fold_duplicate_apps(records),
+                suffix="""
+                    ON CONFLICT (upload_id, app_identifier) DO UPDATE
+                    SET app_name = EXCLUDED.app_name,
+                        app_version = EXCLUDED.app_version,
+                        install_timestamp = EXCLUDED.install_timestamp,
+                        install_timestamp_dt = EXCLUDED.install_timestamp_dt,
+                        updated_at = CURRENT_TIMESTAMP
+                """,
+                returning='id, app_identifier'
             )
-            records.append(record)
-
-        # Insert apps
-        await conn.executemany("""
-            INSERT INTO installed_apps (
-                upload_id, app_identifier, app_name, app_version, app_guid,
-                install_timestamp, install_timestamp_dt,
-                last_launched_timestamp, last_launched_dt,
-                decoding_status, is_emulatable, operation_mode,
-                deleted_state, decoding_confidence,
-                permissions, categories, associated_directory_paths,
-                raw_xml, raw_json
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19)
-            ON CONFLICT (upload_id, app_identifier) DO UPDATE
-            SET app_name = EXCLUDED.app_name,
-                app_version = EXCLUDED.app_version,
-                install_timestamp = EXCLUDED.install_timestamp,
-                install_timestamp_dt = EXCLUDED.install_timestamp_dt,
-                updated_at = CURRENT_TIMESTAMP
-        """, records)
-
-        # Now insert normalized permissions and categories
-        # Get app IDs first
-        app_ids = await conn.fetch("""
-            SELECT id, app_identifier FROM installed_apps
-            WHERE upload_id = $1 AND app_identifier = ANY($2)
-        """, upload_id, [app['app_identifier'] for app in apps])
-
-        app_id_map = {row['app_identifier']: row['id'] for row in app_ids}
-
-        # Prepare permission records
-        for app in apps:
-            app_id = app_id_map.get(app['app_identifier'])
-            if app_id:
-                for permission in app.get('permissions', []):
-                    permission_records.append((
-                        app_id,
-                        upload_id,
-                        app['app_identifier'],
-                        permission
-                    ))
-
-                for category in app.get('categories', []):
-                    category_records.append((
-                        app_id,
-                        upload_id,
-                        app['app_identifier'],
-                        category
-                    ))
-
-        # Insert permissions
-        if permission_records:
-            await conn.executemany("""
-                INSERT INTO installed_app_permissions (app_id, upload_id, app_identifier, permission_category)
-                VALUES ($1, $2, $3, $4)
-                ON CONFLICT DO NOTHING
-            """, permission_records)
-
-        # Insert categories
-        if category_records:
-            await conn.executemany("""
-                INSERT INTO installed_app_categories (app_id, upload_id, app_identifier, category)
-                VALUES ($1, $2, $3, $4)
-                ON CONFLICT DO NOTHING
-            """, category_records)
+
+            # Now insert normalized permissions and categories
+            app_id_map = {row['app_identifier']: row['id'] for row in app_ids}
+
+            # Prepare permission records
+            for app in apps:
+                app_id = app_id_map.get(app['app_identifier'])
+                if app_id:
+                    for permission in app.get('permissions', []):
+                        permission_records.append((
+                            app_id,
+                            upload_id,
+                            app['app_identifier'],
+                            permission
+                        ))
+
+                    for category in app.get('categories', []):
+                        category_records.append((
+                            app_id,
+                            upload_id,
+                            app['app_identifier'],
+                            category
+                        ))
+
+            # COPY can't express ON CONFLICT, so the child rows are sent as
+            # parallel arrays and expanded server-side with unnest: one
+            # statement per table instead of one Bind/Execute per row
+
+            # Insert permissions
+            if permission_records:
+                await conn.execute("""
+                    INSERT INTO installed_app_permissions (app_id, upload_id, app_identifier, permission_category)
+                    SELECT * FROM unnest($1::integer[], $2::text[], $3::text[], $4::text[])
+                    ON CONFLICT DO NOTHING
+                """, *map(list, zip(*permission_records)))
+
+            # Insert categories
+            if category_records:
+                await conn.execute("""
+                    INSERT INTO installed_app_categories (app_id, upload_id, app_identifier, category)
+                    SELECT * FROM unnest($1::integer[], $2::text[], $3::text[], $4::text[])
+                    ON CONFLICT DO NOTHING
+                """, *map(list, zip(*category_records)))
 
     logger.info(f"Bulk inserted {len(apps)} apps for upload_id: {upload_id}")
 
 
-async def get_app_extraction_status(upload_id: str) -> Optional[Dict[str, Any]]:
+async def get_app_extraction_status(upload_id: str) -> Optional[asyncpg.Record]:
     """
     Get the status of an app extraction job.
 
@@ -229,18 +240,14 @@ async def get_app_extraction_status(upload_id: str) -> Optional[Dict[str, Any]]:
         upload_id: Unique identifier for the upload
 
     Returns:
-        Dictionary with extraction status or None if not found
+        Record with extraction status or None if not found
     """
     async with get_db_connection() as conn:
-        row = await conn.fetchrow("""
+        return await conn.fetchrow("""
             SELECT * FROM app_extractions
             WHERE upload_id = $1
         """, upload_id)
 
-        if row:
-            return dict(row)
-        return None
-
 
 async def get_installed_apps(
     upload_id: str,
@@ -249,7 +256,7 @@ async def get_installed_apps(
     permission: Optional[str] = None,
     limit: int = 100,
     offset: int = 0
-) -> List[Dict[str, Any]]:
+) -> List[asyncpg.Record]:
     """
     Get installed apps with optional filtering.
 
@@ -262,7 +269,7 @@ async def get_installed_apps(
         offset: Offset for pagination
 
     Returns:
-        List of app dictionaries
+        List of app Records
     """
     query = """
         SELECT DISTINCT a.* FROM installed_apps a
@@ -300,8 +307,7 @@ async def get_installed_apps(
     params.extend([limit, offset])
 
     async with get_db_connection() as conn:
-        rows = await conn.fetch(query, *params)
-        return [dict(row) for row in rows]
+        return await conn.fetch(query, *params)
 
 
 async def get_app_statistics(upload_id: str) -> Dict[str, Any]:
@@ -314,55 +320,55 @@ async def get_app_statistics(upload_id: str) -> Dict[str, Any]:
     Returns:
         Dictionary with statistics
     """
-    async with get_db_connection() as conn:
-        # Total apps
-        total_apps = await conn.fetchval("""
-            SELECT COUNT(*) FROM installed_apps
-            WHERE upload_id = $1
-        """, upload_id)
-
-        # Apps by category
-        category_stats = await conn.fetch("""
-            SELECT category, COUNT(*) as count
-            FROM installed_app_categories
-            WHERE upload_id = $1
-            GROUP BY category
-            ORDER BY count DESC
-            LIMIT 20
-        """, upload_id)
-
-        # Apps by permission
-        permission_stats = await conn.fetch("""
-            SELECT permission_category, COUNT(*) as count
-            FROM installed_app_permissions
-            WHERE upload_id = $1
-            GROUP BY permission_category
-            ORDER BY count DESC
-            LIMIT 20
-        """, upload_id)
-
-        # Apps with install timestamps
-        apps_with_timestamps = await conn.fetchval("""
-            SELECT COUNT(*) FROM installed_apps
-            WHERE upload_id = $1 AND install_timestamp IS NOT NULL
-        """, upload_id)
-
-        # First and last install dates
-        date_range = await conn.fetchrow("""
+    query = """
+        SELECT
+            totals.total_apps,
+            totals.apps_with_timestamps,
+            totals.first_install,
+            totals.last_install,
+            (
+                SELECT COALESCE(json_agg(t ORDER BY t.count DESC), '[]')
+                FROM (
+                    SELECT category, COUNT(*) as count
+                    FROM installed_app_categories
+                    WHERE upload_id = $1
+                    GROUP BY category
+                    ORDER BY count DESC
+                    LIMIT 20
+                ) t
+            ) AS categories,
+            (
+                SELECT COALESCE(json_agg(t ORDER BY t.count DESC), '[]')
+                FROM (
+                    SELECT permission_category, COUNT(*) as count
+                    FROM installed_app_permissions
+                    WHERE upload_id = $1
+                    GROUP BY permission_category
+                    ORDER BY count DESC
+                    LIMIT 20
+                ) t
+            ) AS permissions
+        FROM (
             SELECT
-                MIN(install_timestamp_dt) as first_install,
-                MAX(install_timestamp_dt) as last_install
+                COUNT(*) AS total_apps,
+                COUNT(install_timestamp) AS apps_with_timestamps,
+                MIN(install_timestamp_dt) AS first_install,
+                MAX(install_timestamp_dt) AS last_install
             FROM installed_apps
-            WHERE upload_id = $1 AND install_timestamp_dt IS NOT NULL
-        """, upload_id)
+            WHERE upload_id = $1
+        ) totals
+    """
+
+    async with get_db_connection() as conn:
+        row = await conn.fetchrow(query, upload_id)
 
         return {
-            'total_apps': total_apps,
-            'apps_with_install_timestamps': apps_with_timestamps,
-            'first_install_date': date_range['first_install'].isoformat() if date_range['first_install'] else None,
-            'last_install_date': date_range['last_install'].isoformat() if date_range['last_install'] else None,
-            'categories': [dict(row) for row in category_stats],
-            'permissions': [dict(row) for row in permission_stats],
+            'total_apps': row['total_apps'],
+            'apps_with_install_timestamps': row['apps_with_timestamps'],
+            'first_install_date': row['first_install'].isoformat() if row['first_install'] else None,
+            'last_install_date': row['last_install'].isoformat() if row['last_install'] else None,
+            'categories': row['categories'],
+            'permissions': row['permissions'],
         }
 
 
@@ -370,7 +376,7 @@ async def search_apps(
     upload_id: str,
     search_term: str,
     limit: int = 50
-) -> List[Dict[str, Any]]:
+) -> List[asyncpg.Record]:
     """
     Search apps by name or identifier.
 
@@ -383,12 +389,10 @@ async def search_apps(
         List of matching apps
     """
     async with get_db_connection() as conn:
-        rows = await conn.fetch("""
+        return await conn.fetch("""
             SELECT * FROM installed_apps
             WHERE upload_id = $1
               AND (app_name ILIKE $2 OR app_identifier ILIKE $2)
             ORDER BY install_timestamp_dt DESC
             LIMIT $3
         """, upload_id, f'%{search_term}%', limit)
-
-        return [dict(row) for row in rows]
@@ -5,27 +5,31 @@ This module provides async functions to interact with the browsing_history table
 """
 
 import asyncpg
-import os
-import json
 from typing import List, Dict, Any, Optional
 import logging
+from datetime import datetime
+from operator import itemgetter
 from .connection import get_db_connection, get_db_pool
+from .helpers import load_schema_sql
 
 logger = logging.getLogger(__name__)
 
+# Column order of the records passed to COPY in bulk_insert_browsing_history
+_BROWSING_COLUMNS = (
+    'upload_id', 'entry_id', 'entry_type', 'source_browser', 'url', 'title',
+    'search_query', 'bookmark_path', 'last_visited', 'last_visited_dt',
+    'visit_count', 'url_cache_file', 'deleted_state', 'decoding_confidence',
+    'raw_xml', 'raw_json',
+)
 
-async def init_browsing_schema():
-    """Initialize the browsing history database schema."""
-    schema_path = os.path.join(
-        os.path.dirname(__file__),
-        'browsing_schema.sql'
-    )
+# Source-dict keys for the columns between upload_id and raw_json
+_BROWSING_DEFAULTS = dict.fromkeys(_BROWSING_COLUMNS[1:-1])
+_browsing_fields = itemgetter(*_BROWSING_COLUMNS[1:-1])
 
-    if not os.path.exists(schema_path):
-        raise FileNotFoundError(f"Schema file not found: {schema_path}")
 
-    with open(schema_path, 'r') as f:
-        schema_sql = f.read()
+async def init_browsing_schema():
+    """Initialize the browsing history database schema."""
+    schema_sql = load_schema_sql('browsing_schema.sql')
 
     async with get_db_connection() as conn:
         await conn.execute(schema_sql)
@@ -57,48 +61,21 @@ async def update_browsing_extraction_status(
     error_message: Optional[str] = None
 ):
     """Update the status of a browsing extraction job."""
+    # Fields left as None keep their current value
     async with get_db_connection() as conn:
-        updates = ["extraction_status = $2", "updated_at = CURRENT_TIMESTAMP"]
-        params = [upload_id, status]
-        param_idx = 3
-
-        if total_entries is not None:
-            updates.append(f"total_entries = ${param_idx}")
-            params.append(total_entries)
-            param_idx += 1
-
-        if processed_entries is not None:
-            updates.append(f"processed_entries = ${param_idx}")
-            params.append(processed_entries)
-            param_idx += 1
-
-        if visited_pages_count is not None:
-            updates.append(f"visited_pages_count = ${param_idx}")
-            params.append(visited_pages_count)
-            param_idx += 1
-
-        if searched_items_count is not None:
-            updates.append(f"searched_items_count = ${param_idx}")
-            params.append(searched_items_count)
-            param_idx += 1
-
-        if bookmarks_count is not None:
-            updates.append(f"bookmarks_count = ${param_idx}")
-            params.append(bookmarks_count)
-            param_idx += 1
-
-        if error_message is not None:
-            updates.append(f"error_message = ${param_idx}")
-            params.append(error_message)
-            param_idx += 1
-
-        query = f"""
+        await conn.execute("""
             UPDATE browsing_extractions
-            SET {', '.join(updates)}
+            SET extraction_status = $2,
+                total_entries = COALESCE($3, total_entries),
+                processed_entries = COALESCE($4, processed_entries),
+                visited_pages_count = COALESCE($5, visited_pages_count),
+                searched_items_count = COALESCE($6, searched_items_count),
+                bookmarks_count = COALESCE($7, bookmarks_count),
+                error_message = COALESCE($8, error_message),
+                updated_at = CURRENT_TIMESTAMP
             WHERE upload_id = $1
-        """
-
-        await conn.execute(query, *params)
+        """, upload_id, status, total_entries, processed_entries,
+            visited_pages_count, searched_items_count, bookmarks_count, error_message)
 
     logger.info(f"Updated browsing extraction status for {upload_id}: {status}")
 
@@ -108,62 +85,33 @@ async def bulk_insert_browsing_history(upload_id: str, entries: List[Dict[str, A
     if not entries:
         return
 
-    async with get_db_connection() as conn:
-        # Prepare entry records
-        entry_records = []
-
+    def entry_records():
         for entry in entries:
-            # Prepare raw_json by converting datetime to string
-            entry_json = entry.copy()
-            if entry_json.get('last_visited_dt'):
-                entry_json['last_visited_dt'] = entry_json['last_visited_dt'].isoformat()
-
-            # Prepare main entry record
-            record = (
+            yield (
                 upload_id,
-                entry.get('entry_id'),
-                entry.get('entry_type'),
-                entry.get('source_browser'),
-                entry.get('url'),
-                entry.get('title'),
-                entry.get('search_query'),
-                entry.get('bookmark_path'),
-                entry.get('last_visited'),
-                entry.get('last_visited_dt'),  # Keep as datetime for database
-                entry.get('visit_count'),
-                entry.get('url_cache_file'),
-                entry.get('deleted_state'),
-                entry.get('decoding_confidence'),
-                entry.get('raw_xml'),
-                json.dumps(entry_json),  # raw_json with datetime converted to string
+                *_browsing_fields({**_BROWSING_DEFAULTS, **entry}),
+                entry,  # raw_json, serialized by the connection's jsonb codec
             )
-            entry_records.append(record)
-
-        # Insert entries
-        await conn.executemany("""
-            INSERT INTO browsing_history (
-                upload_id, entry_id, entry_type, source_browser, url, title,
-                search_query, bookmark_path, last_visited, last_visited_dt,
-                visit_count, url_cache_file, deleted_state, decoding_confidence,
-                raw_xml, raw_json
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16)
-        """, entry_records)
+
+    async with get_db_connection() as conn:
+        # Stream records straight into a single binary COPY
+        await conn.copy_records_to_table(
+            'browsing_history',
+            records=entry_records(),
+            columns=_BROWSING_COLUMNS
+        )
 
     logger.info(f"Bulk inserted {len(entries)} browsing entries for upload_id: {upload_id}")
 
 
-async def get_browsing_extraction_status(upload_id: str) -> Optional[Dict[str, Any]]:
-    """Get the status of a browsing extraction job."""
+async def get_browsing_extraction_status(upload_id: str) -> Optional[asyncpg.Record]:
+    """Get the status of a browsing extraction job as a mapping-like Record."""
     async with get_db_connection() as conn:
-        row = await conn.fetchrow("""
+        return await conn.fetchrow("""
             SELECT * FROM browsing_extractions
             WHERE upload_id = $1
         """, upload_id)
 
-        if row:
-            return dict(row)
-        return None
-
 
 async def get_browsing_history(
     upload_id: str,
@@ -171,9 +119,21 @@ async def get_browsing_history(
     source_browser: Optional[str] = None,
     search_text: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
-) -> List[Dict[str, Any]]:
-    """Get browsing history with optional filtering."""
+    offset: int = 0,
+    before_timestamp: Optional[datetime] = None,
+    before_id: Optional[int] = None
+) -> List[asyncpg.Record]:
+    """
+    Get browsing history with optional filtering, newest first.
+
+    For deep pagination pass the last_visited_dt and id of the last row
+    of the previous page as before_timestamp/before_id instead of an offset;
+    the next page then starts right after it without scanning skipped rows.
+    before_id alone continues past a row without a timestamp.
+    """
+    if before_timestamp is not None and before_id is None:
+        raise ValueError("before_timestamp requires before_id")
+
     query = "SELECT * FROM browsing_history WHERE upload_id = $1"
     params = [upload_id]
     param_idx = 2
@@ -193,74 +153,106 @@ async def get_browsing_history(
         params.append(f'%{search_text}%')
         param_idx += 1
 
-    query += f" ORDER BY last_visited_dt DESC LIMIT ${param_idx} OFFSET ${param_idx + 1}"
+    if before_id is not None:
+        # Keyset cursor; rows without a timestamp sort first (DESC puts NULLs first)
+        if before_timestamp is not None:
+            query += (
+                f" AND (last_visited_dt < ${param_idx}"
+                f" OR (last_visited_dt = ${param_idx} AND id < ${param_idx + 1}))"
+            )
+            params.extend([before_timestamp, before_id])
+            param_idx += 2
+        else:
+            query += (
+                f" AND (last_visited_dt IS NOT NULL"
+                f" OR id < ${param_idx})"
+            )
+            params.append(before_id)
+            param_idx += 1
+
+    query += f" ORDER BY last_visited_dt DESC, id DESC LIMIT ${param_idx} OFFSET ${param_idx + 1}"
     params.extend([limit, offset])
 
     async with get_db_connection() as conn:
-        rows = await conn.fetch(query, *params)
-        return [dict(row) for row in rows]
+        return await conn.fetch(query, *params)
 
 
 async def get_browsing_statistics(upload_id: str) -> Dict[str, Any]:
     """Get statistics about browsing history."""
-    async with get_db_connection() as conn:
-        # Total entries
-        total_entries = await conn.fetchval("""
-            SELECT COUNT(*) FROM browsing_history
-            WHERE upload_id = $1
-        """, upload_id)
-
-        # Entries by type
-        type_stats = await conn.fetch("""
-            SELECT entry_type, COUNT(*) as count
-            FROM browsing_history
-            WHERE upload_id = $1
-            GROUP BY entry_type
-            ORDER BY count DESC
-        """, upload_id)
-
-        # Entries by browser
-        browser_stats = await conn.fetch("""
-            SELECT source_browser, COUNT(*) as count
+    # All breakdowns come from one round-trip; last_visited_dt in
+    # top_searches is returned as an ISO 8601 string
+    query = """
+        WITH b AS (
+            SELECT entry_type, source_browser, url, title, visit_count,
+                   search_query, last_visited_dt
             FROM browsing_history
             WHERE upload_id = $1
-            GROUP BY source_browser
-            ORDER BY count DESC
-        """, upload_id)
-
-        # Top visited sites (most visit count)
-        top_sites = await conn.fetch("""
-            SELECT url, title, source_browser, visit_count
-            FROM browsing_history
-            WHERE upload_id = $1 AND entry_type = 'visited_page' AND visit_count IS NOT NULL
-            ORDER BY visit_count DESC
-            LIMIT 10
-        """, upload_id)
-
-        # Top searches
-        top_searches = await conn.fetch("""
-            SELECT search_query, source_browser, last_visited_dt
-            FROM browsing_history
-            WHERE upload_id = $1 AND entry_type = 'search' AND search_query IS NOT NULL
-            ORDER BY last_visited_dt DESC
-            LIMIT 10
-        """, upload_id)
-
-        # Date range
-        date_range = await conn.fetchrow("""
+        ), g AS (
+            SELECT entry_type, source_browser,
+                   GROUPING(entry_type) AS g_type,
+                   GROUPING(source_browser) AS g_browser,
+                   COUNT(*) AS count
+            FROM b
+            GROUP BY GROUPING SETS ((entry_type), (source_browser))
+        )
+        SELECT
+            totals.total_entries,
+            totals.first_activity,
+            totals.last_activity,
+            (
+                SELECT COALESCE(json_agg(
+                    json_build_object('entry_type', entry_type, 'count', count)
+                    ORDER BY count DESC
+                ), '[]')
+                FROM g
+                WHERE g_type = 0
+            ) AS by_type,
+            (
+                SELECT COALESCE(json_agg(
+                    json_build_object('source_browser', source_browser, 'count', count)
+                    ORDER BY count DESC
+                ), '[]')
+                FROM g
+                WHERE g_browser = 0
+            ) AS by_browser,
+            (
+                SELECT COALESCE(json_agg(t ORDER BY t.visit_count DESC), '[]')
+                FROM (
+                    SELECT url, title, source_browser, visit_count
+                    FROM b
+                    WHERE entry_type = 'visited_page' AND visit_count IS NOT NULL
+                    ORDER BY visit_count DESC
+                    LIMIT 10
+                ) t
+            ) AS top_visited_sites,
+            (
+                SELECT COALESCE(json_agg(t ORDER BY t.last_visited_dt DESC), '[]')
+                FROM (
+                    SELECT search_query, source_browser, last_visited_dt
+                    FROM b
+                    WHERE entry_type = 'search' AND search_query IS NOT NULL
+                    ORDER BY last_visited_dt DESC
+                    LIMIT 10
+                ) t
+            ) AS top_searches
+        FROM (
             SELECT
-                MIN(last_visited_dt) as first_activity,
-                MAX(last_visited_dt) as last_activity
-            FROM browsing_history
-            WHERE upload_id = $1 AND last_visited_dt IS NOT NULL
-        """, upload_id)
+                COUNT(*) AS total_entries,
+                MIN(last_visited_dt) AS first_activity,
+                MAX(last_visited_dt) AS last_activity
+            FROM b
+        ) totals
+    """
+
+    async with get_db_connection() as conn:
+        row = await conn.fetchrow(query, upload_id)
 
         return {
-            'total_entries': total_entries,
-            'first_activity_date': date_range['first_activity'].isoformat() if date_range and date_range['first_activity'] else None,
-            'last_activity_date': date_range['last_activity'].isoformat() if date_range and date_range['last_activity'] else None,
-            'by_type': [dict(row) for row in type_stats],
-            'by_browser': [dict(row) for row in browser_stats],
-            'top_visited_sites': [dict(row) for row in top_sites],
-            'top_searches': [dict(row) for row in top_searches],
+            'total_entries': row['total_entries'],
+            'first_activity_date': row['first_activity'].isoformat() if row['first_activity'] else None,
+            'last_activity_date': row['last_activity'].isoformat() if row['last_activity'] else None,
+            'by_type': row['by_type'],
+            'by_browser': row['by_browser'],
+            'top_visited_sites': row['top_visited_sites'],
+            'top_searches': row['top_searches'],
         }
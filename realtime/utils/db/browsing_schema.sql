@@ -73,6 +73,7 @@ CREATE INDEX idx_browsing_entry_type ON browsing_history(entry_type);
 CREATE INDEX idx_browsing_source_browser ON browsing_history(source_browser);
 CREATE INDEX idx_browsing_last_visited ON browsing_history(last_visited);
 CREATE INDEX idx_browsing_last_visited_dt ON browsing_history(last_visited_dt);
+CREATE INDEX idx_browsing_upload_visited_id ON browsing_history(upload_id, last_visited_dt DESC, id DESC); -- get_browsing_history ordering/keyset pagination
 CREATE INDEX idx_browsing_url ON browsing_history USING hash(url);
 CREATE INDEX idx_browsing_title_text ON browsing_history USING GIN (to_tsvector('english', title));
 CREATE INDEX idx_browsing_search_query_text ON browsing_history USING GIN (to_tsvector('english', search_query));
@@ -5,27 +5,48 @@ This module provides async functions to interact with the call_logs tables.
 """
 
 import asyncpg
-import os
-import json
 from typing import List, Dict, Any, Optional
 import logging
+from datetime import datetime
+from operator import itemgetter
 from .connection import get_db_connection, get_db_pool
+from .helpers import load_schema_sql
 
 logger = logging.getLogger(__name__)
 
+# Column order of the records passed to COPY in bulk_insert_call_logs
+_CALL_LOG_COLUMNS = (
+    'id', 'upload_id', 'call_id', 'source_app', 'direction', 'call_type', 'status',
+    'call_timestamp', 'call_timestamp_dt', 'duration_seconds', 'duration_string',
+    'country_code', 'network_code', 'network_name', 'account', 'is_video_call',
+    'from_party_identifier', 'from_party_name', 'from_party_is_owner',
+    'to_party_identifier', 'to_party_name', 'to_party_is_owner',
+    'deleted_state', 'decoding_confidence', 'raw_xml', 'raw_json',
+)
+
+_CALL_LOG_PARTY_COLUMNS = (
+    'call_log_id', 'upload_id', 'party_identifier', 'party_name',
+    'party_role', 'is_phone_owner', 'raw_json',
+)
+
+# Source-dict keys for the columns between the ids and raw_json; records are
+# built by filling missing keys from the defaults and reading them all at once
+_CALL_LOG_FIELDS = _CALL_LOG_COLUMNS[2:-1]
+_CALL_LOG_DEFAULTS = {
+    **dict.fromkeys(_CALL_LOG_FIELDS),
+    'is_video_call': False,
+    'from_party_is_owner': False,
+    'to_party_is_owner': False,
+}
+_call_log_fields = itemgetter(*_CALL_LOG_FIELDS)
+
+_PARTY_DEFAULTS = {'identifier': None, 'name': None, 'role': None, 'is_phone_owner': False}
+_party_fields = itemgetter(*_PARTY_DEFAULTS)
+
 
 async def init_call_logs_schema():
     """Initialize the call logs database schema."""
-    schema_path = os.path.join(
-        os.path.dirname(__file__),
-        'call_logs_schema.sql'
-    )
-
-    if not os.path.exists(schema_path):
-        raise FileNotFoundError(f"Schema file not found: {schema_path}")
-
-    with open(schema_path, 'r') as f:
-        schema_sql = f.read()
+    schema_sql = load_schema_sql('call_logs_schema.sql')
 
     async with get_db_connection() as conn:
         await conn.execute(schema_sql)
@@ -54,33 +75,17 @@ async def update_call_log_extraction_status(
     error_message: Optional[str] = None
 ):
     """Update the status of a call log extraction job."""
+    # Fields left as None keep their current value
     async with get_db_connection() as conn:
-        updates = ["extraction_status = $2", "updated_at = CURRENT_TIMESTAMP"]
-        params = [upload_id, status]
-        param_idx = 3
-
-        if total_calls is not None:
-            updates.append(f"total_calls = ${param_idx}")
-            params.append(total_calls)
-            param_idx += 1
-
-        if processed_calls is not None:
-            updates.append(f"processed_calls = ${param_idx}")
-            params.append(processed_calls)
-            param_idx += 1
-
-        if error_message is not None:
-            updates.append(f"error_message = ${param_idx}")
-            params.append(error_message)
-            param_idx += 1
-
-        query = f"""
+        await conn.execute("""
             UPDATE call_log_extractions
-            SET {', '.join(updates)}
+            SET extraction_status = $2,
+                total_calls = COALESCE($3, total_calls),
+                processed_calls = COALESCE($4, processed_calls),
+                error_message = COALESCE($5, error_message),
+                updated_at = CURRENT_TIMESTAMP
             WHERE upload_id = $1
-        """
-
-        await conn.execute(query, *params)
+        """, upload_id, status, total_calls, processed_calls, error_message)
 
     logger.info(f"Updated call log extraction status for {upload_id}: {status}")
 
@@ -91,106 +96,63 @@ async def bulk_insert_call_logs(upload_id: str, calls: List[Dict[str, Any]]):
         return
 
     async with get_db_connection() as conn:
-        # Prepare call records
-        call_records = []
-        party_records = []
-
-        for call in calls:
-            # Prepare raw_json by converting datetime to string
-            call_json = call.copy()
-            if call_json.get('call_timestamp_dt'):
-                call_json['call_timestamp_dt'] = call_json['call_timestamp_dt'].isoformat()
-
-            # Prepare main call record
-            record = (
-                upload_id,
-                call.get('call_id'),
-                call.get('source_app'),
-                call.get('direction'),
-                call.get('call_type'),
-                call.get('status'),
-                call.get('call_timestamp'),
-                call.get('call_timestamp_dt'),  # Keep as datetime for database
-                call.get('duration_seconds'),
-                call.get('duration_string'),
-                call.get('country_code'),
-                call.get('network_code'),
-                call.get('network_name'),
-                call.get('account'),
-                call.get('is_video_call', False),
-                call.get('from_party_identifier'),
-                call.get('from_party_name'),
-                call.get('from_party_is_owner', False),
-                call.get('to_party_identifier'),
-                call.get('to_party_name'),
-                call.get('to_party_is_owner', False),
-                call.get('deleted_state'),
-                call.get('decoding_confidence'),
-                call.get('raw_xml'),
-                json.dumps(call_json),  # raw_json with datetime converted to string
-            )
-            call_records.append(record)
-
-        # Insert calls
-        await conn.executemany("""
-            INSERT INTO call_logs (
-                upload_id, call_id, source_app, direction, call_type, status,
-                call_timestamp, call_timestamp_dt, duration_seconds, duration_string,
-                country_code, network_code, network_name, account, is_video_call,
-                from_party_identifier, from_party_name, from_party_is_owner,
-                to_party_identifier, to_party_name, to_party_is_owner,
-                deleted_state, decoding_confidence, raw_xml, raw_json
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15,
-                      $16, $17, $18, $19, $20, $21, $22, $23, $24, $25)
-        """, call_records)
-
-        # Get call IDs for inserted records
-        call_ids = await conn.fetch("""
-            SELECT id, call_id FROM call_logs
-            WHERE upload_id = $1 AND call_id = ANY($2)
-        """, upload_id, [call['call_id'] for call in calls])
-
-        call_id_map = {row['call_id']: row['id'] for row in call_ids}
-
-        # Prepare party records
-        for call in calls:
-            call_log_id = call_id_map.get(call['call_id'])
-            if call_log_id and call.get('parties'):
-                for party in call['parties']:
-                    party_records.append((
+        # Insert calls and their parties atomically
+        async with conn.transaction():
+            # Reserve call log ids up front so parties can reference their
+            # parent without reading the ids back by call_id
+            call_log_ids = await conn.fetchval("""
+                SELECT array_agg(nextval(pg_get_serial_sequence('call_logs', 'id')))
+                FROM generate_series(1, $1)
+            """, len(calls))
+
+            # Prepare call and party records in one pass
+            call_records = []
+            party_records = []
+
+            for call_log_id, call in zip(call_log_ids, calls):
+                call_records.append((
+                    call_log_id,
+                    upload_id,
+                    *_call_log_fields({**_CALL_LOG_DEFAULTS, **call}),
+                    call,  # raw_json, serialized by the connection's jsonb codec
+                ))
+
+                party_records.extend(
+                    (
                         call_log_id,
                         upload_id,
-                        party.get('identifier'),
-                        party.get('name'),
-                        party.get('role'),
-                        party.get('is_phone_owner', False),
-                        json.dumps(party),
-                    ))
-
-        # Insert parties
-        if party_records:
-            await conn.executemany("""
-                INSERT INTO call_log_parties (
-                    call_log_id, upload_id, party_identifier, party_name,
-                    party_role, is_phone_owner, raw_json
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7)
-            """, party_records)
+                        *_party_fields({**_PARTY_DEFAULTS, **party}),
+                        party
+                    )
+                    for party in call.get('parties') or []
+                )
+
+            # Insert calls with a single binary COPY
+            await conn.copy_records_to_table(
+                'call_logs',
+                records=call_records,
+                columns=_CALL_LOG_COLUMNS
+            )
+
+            # Insert parties
+            if party_records:
+                await conn.copy_records_to_table(
+                    'call_log_parties',
+                    records=party_records,
+                    columns=_CALL_LOG_PARTY_COLUMNS
+                )
 
     logger.info(f"Bulk inserted {len(calls)} call logs for upload_id: {upload_id}")
 
 
-async def get_call_log_extraction_status(upload_id: str) -> Optional[Dict[str, Any]]:
-    """Get the status of a call log extraction job."""
+async def get_call_log_extraction_status(upload_id: str) -> Optional[asyncpg.Record]:
+    """Get the status of a call log extraction job as a mapping-like Record."""
     async with get_db_connection() as conn:
-        row = await conn.fetchrow("""
+        return await conn.fetchrow("""
             SELECT * FROM call_log_extractions
             WHERE upload_id = $1
         """, upload_id)
 
-        if row:
-            return dict(row)
-        return None
-
 
 async def get_call_logs(
     upload_id: str,
@@ -199,9 +161,21 @@ async def get_call_logs(
     status: Optional[str] = None,
     is_video: Optional[bool] = None,
     limit: int = 100,
-    offset: int = 0
-) -> List[Dict[str, Any]]:
-    """Get call logs with optional filtering."""
+    offset: int = 0,
+    before_timestamp: Optional[datetime] = None,
+    before_id: Optional[int] = None
+) -> List[asyncpg.Record]:
+    """
+    Get call logs with optional filtering, newest first.
+
+    For deep pagination pass the call_timestamp_dt and id of the last row
+    of the previous page as before_timestamp/before_id instead of an offset;
+    the next page then starts right after it without scanning skipped rows.
+    before_id alone continues past a row without a timestamp.
+    """
+    if before_timestamp is not None and before_id is None:
+        raise ValueError("before_timestamp requires before_id")
+
     query = "SELECT * FROM call_logs WHERE upload_id = $1"
     params = [upload_id]
     param_idx = 2
@@ -226,74 +200,98 @@ async def get_call_logs(
         params.append(is_video)
         param_idx += 1
 
-    query += f" ORDER BY call_timestamp_dt DESC LIMIT ${param_idx} OFFSET ${param_idx + 1}"
+    if before_id is not None:
+        # Keyset cursor; rows without a timestamp sort first (DESC puts NULLs first)
+        if before_timestamp is not None:
+            query += (
+                f" AND (call_timestamp_dt < ${param_idx}"
+                f" OR (call_timestamp_dt = ${param_idx} AND id < ${param_idx + 1}))"
+            )
+            params.extend([before_timestamp, before_id])
+            param_idx += 2
+        else:
+            query += (
+                f" AND (call_timestamp_dt IS NOT NULL"
+                f" OR id < ${param_idx})"
+            )
+            params.append(before_id)
+            param_idx += 1
+
+    query += f" ORDER BY call_timestamp_dt DESC, id DESC LIMIT ${param_idx} OFFSET ${param_idx + 1}"
     params.extend([limit, offset])
 
     async with get_db_connection() as conn:
-        rows = await conn.fetch(query, *params)
-        return [dict(row) for row in rows]
+        return await conn.fetch(query, *params)
 
 
 async def get_call_log_statistics(upload_id: str) -> Dict[str, Any]:
     """Get statistics about call logs."""
-    async with get_db_connection() as conn:
-        # Total calls
-        total_calls = await conn.fetchval("""
-            SELECT COUNT(*) FROM call_logs
-            WHERE upload_id = $1
-        """, upload_id)
-
-        # Calls by app
-        app_stats = await conn.fetch("""
-            SELECT source_app, COUNT(*) as count
+    # All breakdowns come from one scan and one round-trip
+    query = """
+        WITH c AS (
+            SELECT source_app, direction, status, is_video_call, call_timestamp_dt
             FROM call_logs
             WHERE upload_id = $1
-            GROUP BY source_app
-            ORDER BY count DESC
-        """, upload_id)
-
-        # Calls by direction
-        direction_stats = await conn.fetch("""
-            SELECT direction, COUNT(*) as count
-            FROM call_logs
-            WHERE upload_id = $1
-            GROUP BY direction
-        """, upload_id)
-
-        # Calls by status
-        status_stats = await conn.fetch("""
-            SELECT status, COUNT(*) as count
-            FROM call_logs
-            WHERE upload_id = $1
-            GROUP BY status
-            ORDER BY count DESC
-        """, upload_id)
-
-        # Video vs voice
-        video_stats = await conn.fetchrow("""
+        ), g AS (
+            SELECT source_app, direction, status,
+                   GROUPING(source_app) AS g_app,
+                   GROUPING(direction) AS g_direction,
+                   GROUPING(status) AS g_status,
+                   COUNT(*) AS count
+            FROM c
+            GROUP BY GROUPING SETS ((source_app), (direction), (status))
+        )
+        SELECT
+            totals.total_calls,
+            totals.video_calls,
+            totals.voice_calls,
+            totals.first_call,
+            totals.last_call,
+            (
+                SELECT COALESCE(json_agg(
+                    json_build_object('source_app', source_app, 'count', count)
+                    ORDER BY count DESC
+                ), '[]')
+                FROM g
+                WHERE g_app = 0
+            ) AS by_app,
+            (
+                SELECT COALESCE(json_agg(
+                    json_build_object('direction', direction, 'count', count)
+                    ORDER BY count DESC
+                ), '[]')
+                FROM g
+                WHERE g_direction = 0
+            ) AS by_direction,
+            (
+                SELECT COALESCE(json_agg(
+                    json_build_object('status', status, 'count', count)
+                    ORDER BY count DESC
+                ), '[]')
+                FROM g
+                WHERE g_status = 0
+            ) AS by_status
+        FROM (
             SELECT
-                SUM(CASE WHEN is_video_call THEN 1 ELSE 0 END) as video_calls,
-                SUM(CASE WHEN NOT is_video_call THEN 1 ELSE 0 END) as voice_calls
-            FROM call_logs
-            WHERE upload_id = $1
-        """, upload_id)
+                COUNT(*) AS total_calls,
+                SUM(CASE WHEN is_video_call THEN 1 ELSE 0 END) AS video_calls,
+                SUM(CASE WHEN NOT is_video_call THEN 1 ELSE 0 END) AS voice_calls,
+                MIN(call_timestamp_dt) AS first_call,
+                MAX(call_timestamp_dt) AS last_call
+            FROM c
+        ) totals
+    """
 
-        # Date range
-        date_range = await conn.fetchrow("""
-            SELECT
-                MIN(call_timestamp_dt) as first_call,
-                MAX(call_timestamp_dt) as last_call
-            FROM call_logs
-            WHERE upload_id = $1 AND call_timestamp_dt IS NOT NULL
-        """, upload_id)
+    async with get_db_connection() as conn:
+        row = await conn.fetchrow(query, upload_id)
 
         return {
-            'total_calls': total_calls,
-            'video_calls': video_stats['video_calls'] if video_stats else 0,
-            'voice_calls': video_stats['voice_calls'] if video_stats else 0,
-            'first_call_date': date_range['first_call'].isoformat() if date_range and date_range['first_call'] else None,
-            'last_call_date': date_range['last_call'].isoformat() if date_range and date_range['last_call'] else None,
-            'by_app': [dict(row) for row in app_stats],
-            'by_direction': [dict(row) for row in direction_stats],
-            'by_status': [dict(row) for row in status_stats],
+            'total_calls': row['total_calls'],
+            'video_calls': row['video_calls'],
+            'voice_calls': row['voice_calls'],
+            'first_call_date': row['first_call'].isoformat() if row['first_call'] else None,
+            'last_call_date': row['last_call'].isoformat() if row['last_call'] else None,
+            'by_app': row['by_app'],
+            'by_direction': row['by_direction'],
+            'by_status': row['by_status'],
         }
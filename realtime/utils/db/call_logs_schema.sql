@@ -105,6 +105,7 @@ CREATE INDEX idx_call_logs_direction ON call_logs(direction);
 CREATE INDEX idx_call_logs_status ON call_logs(status);
 CREATE INDEX idx_call_logs_timestamp ON call_logs(call_timestamp);
 CREATE INDEX idx_call_logs_timestamp_dt ON call_logs(call_timestamp_dt);
+CREATE INDEX idx_call_logs_upload_timestamp_id ON call_logs(upload_id, call_timestamp_dt DESC, id DESC); -- get_call_logs ordering/keyset pagination
 CREATE INDEX idx_call_logs_from_party ON call_logs(from_party_identifier);
 CREATE INDEX idx_call_logs_to_party ON call_logs(to_party_identifier);
 CREATE INDEX idx_call_logs_is_video ON call_logs(is_video_call);
@@ -1,4 +1,5 @@
 import asyncpg
+import orjson
 import os
 from typing import Optional
 import logging
@@ -22,6 +23,68 @@ logger = logging.getLogger(__name__)
 # Database connection pool
 _pool: Optional[asyncpg.Pool] = None
 
+# Version byte that prefixes the jsonb binary wire format
+_JSONB_VERSION = b'\x01'
+
+# Pool bounds; the worker runs several extractors against the same pool as the API
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+
+# Prepared statements kept per connection; the DB layer issues many constant
+# queries plus the filter-dependent variants of the dynamic getters
+_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 256))
+
+# Idle pooled connections are closed after this many seconds
+_MAX_INACTIVE_CONNECTION_LIFETIME = 600.0
+
+
+def _encode_jsonb(value) -> bytes:
+    """Encode a jsonb parameter; str/bytes are treated as already-serialized JSON."""
+    if isinstance(value, str):
+        return _JSONB_VERSION + value.encode('utf-8')
+    if isinstance(value, (bytes, bytearray)):
+        return _JSONB_VERSION + bytes(value)
+    return _JSONB_VERSION + orjson.dumps(value, default=str)
+
+
+def _decode_jsonb(data: bytes):
+    """Decode a jsonb value received in binary format."""
+    return orjson.loads(data[1:])
+
+
+def _encode_json(value) -> str:
+    """Encode a json parameter; str values are treated as already-serialized JSON."""
+    if isinstance(value, str):
+        return value
+    return orjson.dumps(value, default=str).decode('utf-8')
+
+
+async def _init_connection(conn: asyncpg.Connection):
+    """Set up each new pooled connection before it is handed out."""
+    # Send and receive jsonb in binary so Python objects skip the text round-trip
+    await conn.set_type_codec(
+        'jsonb',
+        encoder=_encode_jsonb,
+        decoder=_decode_jsonb,
+        schema='pg_catalog',
+        format='binary'
+    )
+    # json has no binary format worth using, but decoding it with orjson
+    # means json_agg results arrive as Python objects, not strings
+    await conn.set_type_codec(
+        'json',
+        encoder=_encode_json,
+        decoder=orjson.loads,
+        schema='pg_catalog'
+    )
+
+    # Resolve the codecs for the types the DB layer exchanges most so the
+    # first real query on this connection doesn't pay for it
+    await conn.fetchrow(
+        'SELECT NULL::jsonb, NULL::timestamp, NULL::timestamptz, NULL::integer[], NULL::text[]'
+    )
+
+
 async def init_db_pool():
     """Initialize the database connection pool"""
     global _pool
@@ -36,9 +99,12 @@ async def init_db_pool():
     try:
         _pool = await asyncpg.create_pool(
             database_url,
-            min_size=2,
-            max_size=10,
-            command_timeout=60
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            command_timeout=60,
+            statement_cache_size=_STATEMENT_CACHE_SIZE,
+            max_inactive_connection_lifetime=_MAX_INACTIVE_CONNECTION_LIFETIME,
+            init=_init_connection
         )
         logger.info("Database connection pool initialized successfully")
         return _pool
@@ -4,28 +4,54 @@ Database operations for contacts extracted from UFDR files.
 This module provides async functions to interact with the contacts tables.
 """
 
+import asyncio
 import asyncpg
-import os
-import json
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 import logging
+from operator import itemgetter
 from .connection import get_db_connection, get_db_pool
+from .helpers import chunked, load_schema_sql, COPY_CHUNK_SIZE, CURSOR_PREFETCH
+from ..cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Per-upload statistics, invalidated whenever new contacts are inserted
+_statistics_cache = TTLCache(maxsize=128, ttl=60)
+
+# Column order of the records passed to COPY in bulk_insert_contacts
+_CONTACT_COLUMNS = (
+    'id', 'upload_id', 'contact_id', 'source_app', 'service_identifier',
+    'name', 'account', 'contact_type', 'contact_group',
+    'time_created', 'time_created_dt', 'notes', 'interaction_statuses',
+    'user_tags', 'deleted_state', 'decoding_confidence',
+    'raw_xml', 'raw_json',
+)
+
+_CONTACT_ENTRY_COLUMNS = (
+    'contact_id', 'upload_id', 'entry_id', 'entry_type',
+    'category', 'value', 'domain', 'deleted_state',
+    'decoding_confidence', 'raw_xml', 'raw_json',
+)
+
+# Source-dict keys for the columns between the ids and raw_json; records are
+# built by filling missing keys from the defaults and reading them all at once
+_CONTACT_FIELDS = _CONTACT_COLUMNS[2:-1]
+_CONTACT_DEFAULTS = {
+    **dict.fromkeys(_CONTACT_FIELDS),
+    'notes': [],
+    'interaction_statuses': [],
+    'user_tags': [],
+}
+_contact_fields = itemgetter(*_CONTACT_FIELDS)
+
+_CONTACT_ENTRY_FIELDS = _CONTACT_ENTRY_COLUMNS[2:-1]
+_CONTACT_ENTRY_DEFAULTS = dict.fromkeys(_CONTACT_ENTRY_FIELDS)
+_contact_entry_fields = itemgetter(*_CONTACT_ENTRY_FIELDS)
+
 
 async def init_contacts_schema():
     """Initialize the contacts database schema."""
-    schema_path = os.path.join(
-        os.path.dirname(__file__),
-        'contacts_schema.sql'
-    )
-
-    if not os.path.exists(schema_path):
-        raise FileNotFoundError(f"Schema file not found: {schema_path}")
-
-    with open(schema_path, 'r') as f:
-        schema_sql = f.read()
+    schema_sql = load_schema_sql('contacts_schema.sql')
 
     async with get_db_connection() as conn:
         await conn.execute(schema_sql)
@@ -55,38 +81,18 @@ async def update_contact_extraction_status(
     error_message: Optional[str] = None
 ):
     """Update the status of a contact extraction job."""
+    # Fields left as None keep their current value
     async with get_db_connection() as conn:
-        updates = ["extraction_status = $2", "updated_at = CURRENT_TIMESTAMP"]
-        params = [upload_id, status]
-        param_idx = 3
-
-        if total_contacts is not None:
-            updates.append(f"total_contacts = ${param_idx}")
-            params.append(total_contacts)
-            param_idx += 1
-
-        if processed_contacts is not None:
-            updates.append(f"processed_contacts = ${param_idx}")
-            params.append(processed_contacts)
-            param_idx += 1
-
-        if total_entries is not None:
-            updates.append(f"total_entries = ${param_idx}")
-            params.append(total_entries)
-            param_idx += 1
-
-        if error_message is not None:
-            updates.append(f"error_message = ${param_idx}")
-            params.append(error_message)
-            param_idx += 1
-
-        query = f"""
+        await conn.execute("""
             UPDATE contact_extractions
-            SET {', '.join(updates)}
+            SET extraction_status = $2,
+                total_contacts = COALESCE($3, total_contacts),
+                processed_contacts = COALESCE($4, processed_contacts),
+                total_entries = COALESCE($5, total_entries),
+                error_message = COALESCE($6, error_message),
+                updated_at = CURRENT_TIMESTAMP
             WHERE upload_id = $1
-        """
-
-        await conn.execute(query, *params)
+        """, upload_id, status, total_contacts, processed_contacts, total_entries, error_message)
 
     logger.info(f"Updated contact extraction status for {upload_id}: {status}")
 
@@ -99,88 +105,100 @@ async def bulk_insert_contacts(upload_id: str, contacts: List[Dict[str, Any]]):
     async with get_db_connection() as conn:
         # Start a transaction
         async with conn.transaction():
-            for contact in contacts:
-                # Prepare contact data
-                contact_json = contact.copy()
-                if contact_json.get('time_created_dt'):
-                    contact_json['time_created_dt'] = contact_json['time_created_dt'].isoformat()
-
-                # Remove entries from JSON (they'll be in separate table)
-                entries = contact_json.pop('entries', [])
-
-                # Insert main contact record
-                contact_db_id = await conn.fetchval("""
-                    INSERT INTO contacts (
-                        upload_id, contact_id, source_app, service_identifier,
-                        name, account, contact_type, contact_group,
-                        time_created, time_created_dt, notes, interaction_statuses,
-                        user_tags, deleted_state, decoding_confidence,
-                        raw_xml, raw_json
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17)
-                    RETURNING id
-                """,
-                    upload_id,
-                    contact.get('contact_id'),
-                    contact.get('source_app'),
-                    contact.get('service_identifier'),
-                    contact.get('name'),
-                    contact.get('account'),
-                    contact.get('contact_type'),
-                    contact.get('contact_group'),
-                    contact.get('time_created'),
-                    contact.get('time_created_dt'),
-                    contact.get('notes', []),
-                    contact.get('interaction_statuses', []),
-                    contact.get('user_tags', []),
-                    contact.get('deleted_state'),
-                    contact.get('decoding_confidence'),
-                    contact.get('raw_xml'),
-                    json.dumps(contact_json)
-                )
-
-                # Insert contact entries
-                if entries:
-                    entry_records = []
-                    for entry in entries:
-                        entry_json = entry.copy()
-
-                        entry_record = (
+            # Reserve contact ids up front so entries can reference their
+            # parent without a RETURNING round-trip per contact
+            contact_db_ids = await conn.fetchval("""
+                SELECT array_agg(nextval(pg_get_serial_sequence('contacts', 'id')))
+                FROM generate_series(1, $1)
+            """, len(contacts))
+
+            # Copy in bounded chunks so large uploads don't hold every
+            # record in memory at once
+            for chunk in chunked(zip(contact_db_ids, contacts), COPY_CHUNK_SIZE):
+                contact_records = []
+                entry_records = []
+
+                for contact_db_id, contact in chunk:
+                    # Prepare contact data; the jsonb codec serializes it on the wire
+                    contact_json = contact.copy()
+
+                    # Remove entries from JSON (they'll be in separate table)
+                    entries = contact_json.pop('entries', [])
+
+                    contact_records.append((
+                        contact_db_id,
+                        upload_id,
+                        *_contact_fields({**_CONTACT_DEFAULTS, **contact}),
+                        contact_json
+                    ))
+
+                    entry_records.extend(
+                        (
                             contact_db_id,
                             upload_id,
-                            entry.get('entry_id'),
-                            entry.get('entry_type'),
-                            entry.get('category'),
-                            entry.get('value'),
-                            entry.get('domain'),
-                            entry.get('deleted_state'),
-                            entry.get('decoding_confidence'),
-                            entry.get('raw_xml'),
-                            json.dumps(entry_json)
+                            *_contact_entry_fields({**_CONTACT_ENTRY_DEFAULTS, **entry}),
+                            entry
                         )
-                        entry_records.append(entry_record)
+                        for entry in entries
+                    )
+
+                # Insert contacts and their entries with one COPY each
+                await conn.copy_records_to_table(
+                    'contacts',
+                    records=contact_records,
+                    columns=_CONTACT_COLUMNS
+                )
 
-                    await conn.executemany("""
-                        INSERT INTO contact_entries (
-                            contact_id, upload_id, entry_id, entry_type,
-                            category, value, domain, deleted_state,
-                            decoding_confidence, raw_xml, raw_json
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                    """, entry_records)
+                if entry_records:
+                    await conn.copy_records_to_table(
+                        'contact_entries',
+                        records=entry_records,
+                        columns=_CONTACT_ENTRY_COLUMNS
+                    )
 
+                # Let other tasks run between chunks
+                await asyncio.sleep(0)
+
+    _statistics_cache.invalidate(upload_id)
     logger.info(f"Bulk inserted {len(contacts)} contacts for upload_id: {upload_id}")
 
 
-async def get_contact_extraction_status(upload_id: str) -> Optional[Dict[str, Any]]:
-    """Get the status of a contact extraction job."""
+async def get_contact_extraction_status(upload_id: str) -> Optional[asyncpg.Record]:
+    """Get the status of a contact extraction job as a mapping-like Record."""
     async with get_db_connection() as conn:
-        row = await conn.fetchrow("""
+        return await conn.fetchrow("""
             SELECT * FROM contact_extractions
             WHERE upload_id = $1
         """, upload_id)
 
-        if row:
-            return dict(row)
-        return None
+
+# Shared by get_contacts and iter_contacts. Unused filters are passed as
+# NULL so the statement text stays constant and asyncpg can reuse its
+# prepared statement across calls. Entries are aggregated per contact in a
+# lateral subquery rather than grouping the joined wide rows.
+_CONTACTS_QUERY = """
+    SELECT c.*, e.entries
+    FROM contacts c
+    LEFT JOIN LATERAL (
+        SELECT json_agg(
+                   json_build_object(
+                       'entry_type', ce.entry_type,
+                       'category', ce.category,
+                       'value', ce.value,
+                       'domain', ce.domain
+                   )
+                   ORDER BY ce.id
+               ) as entries
+        FROM contact_entries ce
+        WHERE ce.contact_id = c.id
+    ) e ON true
+    WHERE c.upload_id = $1
+      AND ($2::text IS NULL OR c.source_app = $2)
+      AND ($3::text IS NULL OR c.contact_type = $3)
+      AND ($4::text IS NULL OR c.name ILIKE $4 OR c.account ILIKE $4)
+    ORDER BY c.time_created_dt DESC NULLS LAST
+    LIMIT $5 OFFSET $6
+"""
 
 
 async def get_contacts(
@@ -190,46 +208,93 @@ async def get_contacts(
     search_text: Optional[str] = None,
     limit: int = 100,
     offset: int = 0
-) -> List[Dict[str, Any]]:
+) -> List[asyncpg.Record]:
     """Get contacts with optional filtering."""
+    async with get_db_connection() as conn:
+        rows = await conn.fetch(
+            _CONTACTS_QUERY,
+            upload_id,
+            source_app or None,
+            contact_type or None,
+            f'%{search_text}%' if search_text else None,
+            limit,
+            offset
+        )
+        return rows
+
+
+async def iter_contacts(
+    upload_id: str,
+    source_app: Optional[str] = None,
+    contact_type: Optional[str] = None,
+    search_text: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> AsyncIterator[asyncpg.Record]:
+    """Stream contacts through a server-side cursor; use for large result sets."""
+    async with get_db_connection() as conn:
+        # Cursors only exist inside a transaction
+        async with conn.transaction():
+            async for row in conn.cursor(
+                _CONTACTS_QUERY,
+                upload_id,
+                source_app or None,
+                contact_type or None,
+                f'%{search_text}%' if search_text else None,
+                limit,
+                offset,
+                prefetch=CURSOR_PREFETCH
+            ):
+                yield row
+
+
+async def get_contacts_by_entry_type(
+    upload_id: str,
+    entry_type: str,
+    search_text: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0
+) -> List[asyncpg.Record]:
+    """Get contacts with one matching entry of the given type (as value/category)."""
+    # One matching entry per contact via an indexed lateral lookup, so the
+    # joined rows never need a DISTINCT ON sort. entry_type is a parameter
+    # so every entry type shares a single prepared statement.
     query = """
-        SELECT c.*,
-               json_agg(
-                   json_build_object(
-                       'entry_type', ce.entry_type,
-                       'category', ce.category,
-                       'value', ce.value,
-                       'domain', ce.domain
-                   )
-               ) FILTER (WHERE ce.id IS NOT NULL) as entries
+        SELECT
+            c.id, c.name, c.source_app, c.contact_type, c.account,
+            ce.value, ce.category,
+            c.time_created_dt
         FROM contacts c
-        LEFT JOIN contact_entries ce ON c.id = ce.contact_id
+        INNER JOIN LATERAL (
+            SELECT value, category
+            FROM contact_entries
+            WHERE contact_id = c.id AND entry_type = $2
+              AND ($3::text IS NULL OR c.name ILIKE $3 OR value ILIKE $3)
+            LIMIT 1
+        ) ce ON true
         WHERE c.upload_id = $1
+        ORDER BY c.id
+        LIMIT $4 OFFSET $5
     """
-    params = [upload_id]
-    param_idx = 2
-
-    if source_app:
-        query += f" AND c.source_app = ${param_idx}"
-        params.append(source_app)
-        param_idx += 1
-
-    if contact_type:
-        query += f" AND c.contact_type = ${param_idx}"
-        params.append(contact_type)
-        param_idx += 1
 
-    if search_text:
-        query += f" AND (c.name ILIKE ${param_idx} OR c.account ILIKE ${param_idx})"
-        params.append(f'%{search_text}%')
-        param_idx += 1
+    async with get_db_connection() as conn:
+        rows = await conn.fetch(
+            query,
+            upload_id,
+            entry_type,
+            f'%{search_text}%' if search_text else None,
+            limit,
+            offset
+        )
+        return rows
 
-    query += f" GROUP BY c.id ORDER BY c.time_created_dt DESC NULLS LAST LIMIT ${param_idx} OFFSET ${param_idx + 1}"
-    params.extend([limit, offset])
 
-    async with get_db_connection() as conn:
-        rows = await conn.fetch(query, *params)
-        return [dict(row) for row in rows]
+def _rename_entry_columns(row: asyncpg.Record, value_key: str, category_key: str) -> Dict[str, Any]:
+    """Expose a get_contacts_by_entry_type row under type-specific column names."""
+    contact = dict(row)
+    contact[value_key] = contact.pop('value')
+    contact[category_key] = contact.pop('category')
+    return contact
 
 
 async def get_phone_contacts(
@@ -239,29 +304,8 @@ async def get_phone_contacts(
     offset: int = 0
 ) -> List[Dict[str, Any]]:
     """Get contacts with phone numbers."""
-    query = """
-        SELECT DISTINCT ON (c.id)
-            c.id, c.name, c.source_app, c.contact_type, c.account,
-            ce.value as phone_number, ce.category as phone_type,
-            c.time_created_dt
-        FROM contacts c
-        INNER JOIN contact_entries ce ON c.id = ce.contact_id
-        WHERE c.upload_id = $1 AND ce.entry_type = 'PhoneNumber'
-    """
-    params = [upload_id]
-    param_idx = 2
-
-    if search_text:
-        query += f" AND (c.name ILIKE ${param_idx} OR ce.value ILIKE ${param_idx})"
-        params.append(f'%{search_text}%')
-        param_idx += 1
-
-    query += f" ORDER BY c.id, c.time_created_dt DESC NULLS LAST LIMIT ${param_idx} OFFSET ${param_idx + 1}"
-    params.extend([limit, offset])
-
-    async with get_db_connection() as conn:
-        rows = await conn.fetch(query, *params)
-        return [dict(row) for row in rows]
+    rows = await get_contacts_by_entry_type(upload_id, 'PhoneNumber', search_text, limit, offset)
+    return [_rename_entry_columns(row, 'phone_number', 'phone_type') for row in rows]
 
 
 async def get_email_contacts(
@@ -271,86 +315,84 @@ async def get_email_contacts(
     offset: int = 0
 ) -> List[Dict[str, Any]]:
     """Get contacts with email addresses."""
-    query = """
-        SELECT DISTINCT ON (c.id)
-            c.id, c.name, c.source_app, c.contact_type, c.account,
-            ce.value as email_address, ce.category as email_type,
-            c.time_created_dt
-        FROM contacts c
-        INNER JOIN contact_entries ce ON c.id = ce.contact_id
-        WHERE c.upload_id = $1 AND ce.entry_type = 'EmailAddress'
-    """
-    params = [upload_id]
-    param_idx = 2
-
-    if search_text:
-        query += f" AND (c.name ILIKE ${param_idx} OR ce.value ILIKE ${param_idx})"
-        params.append(f'%{search_text}%')
-        param_idx += 1
-
-    query += f" ORDER BY c.id, c.time_created_dt DESC NULLS LAST LIMIT ${param_idx} OFFSET ${param_idx + 1}"
-    params.extend([limit, offset])
-
-    async with get_db_connection() as conn:
-        rows = await conn.fetch(query, *params)
-        return [dict(row) for row in rows]
+    rows = await get_contacts_by_entry_type(upload_id, 'EmailAddress', search_text, limit, offset)
+    return [_rename_entry_columns(row, 'email_address', 'email_type') for row in rows]
 
 
 async def get_contact_statistics(upload_id: str) -> Dict[str, Any]:
     """Get statistics about contacts."""
-    async with get_db_connection() as conn:
-        # Total contacts
-        total_contacts = await conn.fetchval("""
-            SELECT COUNT(*) FROM contacts
-            WHERE upload_id = $1
-        """, upload_id)
-
-        # Contacts by source app
-        app_stats = await conn.fetch("""
-            SELECT source_app, COUNT(*) as count
-            FROM contacts
-            WHERE upload_id = $1
-            GROUP BY source_app
-            ORDER BY count DESC
-        """, upload_id)
-
-        # Contacts by type
-        type_stats = await conn.fetch("""
-            SELECT contact_type, COUNT(*) as count
+    cached = _statistics_cache.get(upload_id)
+    if cached is not None:
+        return cached
+
+    # The contacts and entries aggregates touch different tables, so they
+    # run concurrently on two pool connections; each breakdown comes back
+    # as a JSON array of {column, count} objects
+    contacts_query = """
+        WITH c AS (
+            SELECT source_app, contact_type
             FROM contacts
             WHERE upload_id = $1
-            GROUP BY contact_type
-            ORDER BY count DESC
-        """, upload_id)
+        )
+        SELECT
+            (SELECT COUNT(*) FROM c) AS total_contacts,
+            (
+                SELECT COALESCE(json_agg(s ORDER BY s.count DESC), '[]')
+                FROM (
+                    SELECT source_app, COUNT(*) AS count
+                    FROM c
+                    GROUP BY source_app
+                ) s
+            ) AS by_source_app,
+            (
+                SELECT COALESCE(json_agg(s ORDER BY s.count DESC), '[]')
+                FROM (
+                    SELECT contact_type, COUNT(*) AS count
+                    FROM c
+                    GROUP BY contact_type
+                ) s
+            ) AS by_contact_type
+    """
 
-        # Entry type distribution
-        entry_stats = await conn.fetch("""
-            SELECT entry_type, COUNT(*) as count
+    entries_query = """
+        WITH e AS (
+            SELECT contact_id, entry_type
             FROM contact_entries
             WHERE upload_id = $1
-            GROUP BY entry_type
-            ORDER BY count DESC
-        """, upload_id)
-
-        # Contacts with phone numbers
-        phone_count = await conn.fetchval("""
-            SELECT COUNT(DISTINCT contact_id)
-            FROM contact_entries
-            WHERE upload_id = $1 AND entry_type = 'PhoneNumber'
-        """, upload_id)
+        )
+        SELECT
+            (
+                SELECT COALESCE(json_agg(s ORDER BY s.count DESC), '[]')
+                FROM (
+                    SELECT entry_type, COUNT(*) AS count
+                    FROM e
+                    GROUP BY entry_type
+                ) s
+            ) AS by_entry_type,
+            entry_counts.contacts_with_phone,
+            entry_counts.contacts_with_email
+        FROM (
+            SELECT
+                COUNT(DISTINCT contact_id) FILTER (WHERE entry_type = 'PhoneNumber') AS contacts_with_phone,
+                COUNT(DISTINCT contact_id) FILTER (WHERE entry_type = 'EmailAddress') AS contacts_with_email
+            FROM e
+        ) entry_counts
+    """
 
-        # Contacts with emails
-        email_count = await conn.fetchval("""
-            SELECT COUNT(DISTINCT contact_id)
-            FROM contact_entries
-            WHERE upload_id = $1 AND entry_type = 'EmailAddress'
-        """, upload_id)
+    pool = await get_db_pool()
+    contacts_row, entries_row = await asyncio.gather(
+        pool.fetchrow(contacts_query, upload_id),
+        pool.fetchrow(entries_query, upload_id)
+    )
 
-        return {
-            'total_contacts': total_contacts,
-            'by_source_app': [dict(row) for row in app_stats],
-            'by_contact_type': [dict(row) for row in type_stats],
-            'by_entry_type': [dict(row) for row in entry_stats],
-            'contacts_with_phone': phone_count,
-            'contacts_with_email': email_count,
-        }
+    statistics = {
+        'total_contacts': contacts_row['total_contacts'],
+        'by_source_app': contacts_row['by_source_app'],
+        'by_contact_type': contacts_row['by_contact_type'],
+        'by_entry_type': entries_row['by_entry_type'],
+        'contacts_with_phone': entries_row['contacts_with_phone'],
+        'contacts_with_email': entries_row['contacts_with_email'],
+    }
+
+    _statistics_cache.set(upload_id, statistics)
+    return statistics
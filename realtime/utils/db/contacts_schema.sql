@@ -3,6 +3,9 @@
 -- Author: UFDR-Agent Team
 -- Date: 2025-12-09
 
+-- Trigram operators for substring (ILIKE '%...%') search indexes
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- Drop existing tables if they exist
 DROP TABLE IF EXISTS contact_entries CASCADE;
 DROP TABLE IF EXISTS contacts CASCADE;
@@ -104,12 +107,18 @@ CREATE INDEX idx_contacts_name ON contacts USING GIN (to_tsvector('english', nam
 CREATE INDEX idx_contacts_contact_type ON contacts(contact_type);
 CREATE INDEX idx_contacts_account ON contacts(account);
 
-CREATE INDEX idx_contact_entries_contact_id ON contact_entries(contact_id);
+-- Also serves plain contact_id lookups; covers the per-type lateral lookups
+CREATE INDEX idx_contact_entries_contact_id_type ON contact_entries(contact_id, entry_type);
 CREATE INDEX idx_contact_entries_upload_id ON contact_entries(upload_id);
 CREATE INDEX idx_contact_entries_entry_type ON contact_entries(entry_type);
 CREATE INDEX idx_contact_entries_category ON contact_entries(category);
 CREATE INDEX idx_contact_entries_value ON contact_entries USING GIN (to_tsvector('english', value));
 
+-- Trigram indexes backing the ILIKE '%search%' filters in the getters
+CREATE INDEX idx_contacts_name_trgm ON contacts USING GIN (name gin_trgm_ops);
+CREATE INDEX idx_contacts_account_trgm ON contacts USING GIN (account gin_trgm_ops);
+CREATE INDEX idx_contact_entries_value_trgm ON contact_entries USING GIN (value gin_trgm_ops);
+
 -- View for phone contacts with phone numbers
 CREATE OR REPLACE VIEW phone_contacts_view AS
 SELECT
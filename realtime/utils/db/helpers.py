@@ -0,0 +1,84 @@
+"""
+Shared helpers for the database operation modules.
+"""
+
+import os
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+import asyncpg
+
+T = TypeVar('T')
+
+# Rows sent per COPY by the bulk insert functions
+COPY_CHUNK_SIZE = 5000
+
+# Rows fetched per round-trip by the streaming (cursor-based) getters
+CURSOR_PREFETCH = 1000
+
+# Bind parameters allowed in one statement by the Postgres wire protocol
+MAX_QUERY_ARGS = 32767
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Yield successive lists of at most size items from iterable."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+@lru_cache(maxsize=None)
+def load_schema_sql(filename: str) -> str:
+    """Read a schema file from this package once and keep its contents in memory."""
+    schema_path = os.path.join(os.path.dirname(__file__), filename)
+
+    if not os.path.exists(schema_path):
+        raise FileNotFoundError(f"Schema file not found: {schema_path}")
+
+    with open(schema_path, 'r') as f:
+        return f.read()
+
+
+async def multi_values_insert(
+    conn: asyncpg.Connection,
+    table: str,
+    columns: Sequence[str],
+    rows: Sequence[tuple],
+    suffix: str = '',
+    returning: Optional[str] = None,
+    chunk_size: int = 1000
+) -> List[asyncpg.Record]:
+    """
+    Insert rows with multi-row INSERT ... VALUES statements.
+
+    Meant for inserts that need ON CONFLICT handling, which COPY cannot
+    express; suffix (e.g. an ON CONFLICT clause) is appended to every
+    statement. Each statement carries at most chunk_size rows, fewer if
+    needed to stay under the bind parameter limit. Postgres rejects a
+    statement whose rows hit the same conflict key twice, so callers must
+    deduplicate on that key first.
+
+    If returning is given (e.g. 'id, name') it is used as the RETURNING
+    list and the rows it yields are returned; otherwise an empty list.
+    """
+    width = len(columns)
+    chunk_size = max(1, min(chunk_size, MAX_QUERY_ARGS // width))
+    column_list = ', '.join(columns)
+    returning_clause = f" RETURNING {returning}" if returning else ''
+    returned = []
+
+    for chunk in chunked(rows, chunk_size):
+        placeholders = ', '.join(
+            '(' + ', '.join(f'${i * width + j + 1}' for j in range(width)) + ')'
+            for i in range(len(chunk))
+        )
+        query = f"INSERT INTO {table} ({column_list}) VALUES {placeholders} {suffix}{returning_clause}"
+        args = [value for row in chunk for value in row]
+
+        if returning:
+            returned.extend(await conn.fetch(query, *args))
+        else:
+            await conn.execute(query, *args)
+
+    return returned
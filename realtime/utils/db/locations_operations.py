@@ -4,28 +4,47 @@ Database operations for location data extracted from UFDR files.
 This module provides async functions to interact with the locations tables.
 """
 
+import asyncio
 import asyncpg
-import os
-import json
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 import logging
+from operator import itemgetter
 from .connection import get_db_connection, get_db_pool
+from .helpers import chunked, load_schema_sql, COPY_CHUNK_SIZE, CURSOR_PREFETCH
+from ..cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Per-upload statistics, invalidated whenever new locations are inserted
+_statistics_cache = TTLCache(maxsize=128, ttl=60)
+
+# Column order of the records passed to COPY in bulk_insert_locations
+_LOCATION_COLUMNS = (
+    'upload_id', 'location_id', 'source_app', 'latitude', 'longitude', 'altitude',
+    'accuracy', 'vertical_accuracy', 'bearing', 'speed', 'location_type', 'category',
+    'address', 'city', 'state', 'country', 'postal_code',
+    'location_timestamp', 'location_timestamp_dt',
+    'device_name', 'platform', 'confidence',
+    'activity_type', 'activity_confidence',
+    'deleted_state', 'decoding_confidence', 'raw_xml', 'raw_json',
+)
+
+# Source-dict keys for the columns between upload_id and raw_json, split
+# around the DOUBLE PRECISION measurements so those can be coerced to float
+_LOCATION_DEFAULTS = dict.fromkeys(_LOCATION_COLUMNS[1:-1])
+_location_head = itemgetter(*_LOCATION_COLUMNS[1:3])
+_location_floats = itemgetter(*_LOCATION_COLUMNS[3:10])
+_location_tail = itemgetter(*_LOCATION_COLUMNS[10:-1])
 
-async def init_locations_schema():
-    """Initialize the locations database schema."""
-    schema_path = os.path.join(
-        os.path.dirname(__file__),
-        'locations_schema.sql'
-    )
 
-    if not os.path.exists(schema_path):
-        raise FileNotFoundError(f"Schema file not found: {schema_path}")
+def _as_float(value) -> Optional[float]:
+    """Coerce a coordinate/measurement to float for the binary float8 COPY path."""
+    return float(value) if value is not None else None
 
-    with open(schema_path, 'r') as f:
-        schema_sql = f.read()
+
+async def init_locations_schema():
+    """Initialize the locations database schema."""
+    schema_sql = load_schema_sql('locations_schema.sql')
 
     async with get_db_connection() as conn:
         await conn.execute(schema_sql)
@@ -54,33 +73,17 @@ async def update_location_extraction_status(
     error_message: Optional[str] = None
 ):
     """Update the status of a location extraction job."""
+    # Fields left as None keep their current value
     async with get_db_connection() as conn:
-        updates = ["extraction_status = $2", "updated_at = CURRENT_TIMESTAMP"]
-        params = [upload_id, status]
-        param_idx = 3
-
-        if total_locations is not None:
-            updates.append(f"total_locations = ${param_idx}")
-            params.append(total_locations)
-            param_idx += 1
-
-        if processed_locations is not None:
-            updates.append(f"processed_locations = ${param_idx}")
-            params.append(processed_locations)
-            param_idx += 1
-
-        if error_message is not None:
-            updates.append(f"error_message = ${param_idx}")
-            params.append(error_message)
-            param_idx += 1
-
-        query = f"""
+        await conn.execute("""
             UPDATE location_extractions
-            SET {', '.join(updates)}
+            SET extraction_status = $2,
+                total_locations = COALESCE($3, total_locations),
+                processed_locations = COALESCE($4, processed_locations),
+                error_message = COALESCE($5, error_message),
+                updated_at = CURRENT_TIMESTAMP
             WHERE upload_id = $1
-        """
-
-        await conn.execute(query, *params)
+        """, upload_id, status, total_locations, processed_locations, error_message)
 
     logger.info(f"Updated location extraction status for {upload_id}: {status}")
 
@@ -90,77 +93,61 @@ async def bulk_insert_locations(upload_id: str, locations: List[Dict[str, Any]])
     if not locations:
         return
 
-    async with get_db_connection() as conn:
-        # Prepare location records
-        location_records = []
-
-        for location in locations:
-            # Prepare raw_json by converting datetime to string
-            location_json = location.copy()
-            if location_json.get('location_timestamp_dt'):
-                location_json['location_timestamp_dt'] = location_json['location_timestamp_dt'].isoformat()
-
-            # Prepare main location record
-            record = (
+    def location_records(chunk):
+        for location in chunk:
+            values = {**_LOCATION_DEFAULTS, **location}
+            yield (
                 upload_id,
-                location.get('location_id'),
-                location.get('source_app'),
-                location.get('latitude'),
-                location.get('longitude'),
-                location.get('altitude'),
-                location.get('accuracy'),
-                location.get('vertical_accuracy'),
-                location.get('bearing'),
-                location.get('speed'),
-                location.get('location_type'),
-                location.get('category'),
-                location.get('address'),
-                location.get('city'),
-                location.get('state'),
-                location.get('country'),
-                location.get('postal_code'),
-                location.get('location_timestamp'),
-                location.get('location_timestamp_dt'),  # Keep as datetime for database
-                location.get('device_name'),
-                location.get('platform'),
-                location.get('confidence'),
-                location.get('activity_type'),
-                location.get('activity_confidence'),
-                location.get('deleted_state'),
-                location.get('decoding_confidence'),
-                location.get('raw_xml'),
-                json.dumps(location_json),  # raw_json with datetime converted to string
+                *_location_head(values),
+                *map(_as_float, _location_floats(values)),
+                *_location_tail(values),
+                location,  # raw_json, serialized by the connection's jsonb codec
             )
-            location_records.append(record)
-
-        # Insert locations
-        await conn.executemany("""
-            INSERT INTO locations (
-                upload_id, location_id, source_app, latitude, longitude, altitude,
-                accuracy, vertical_accuracy, bearing, speed, location_type, category,
-                address, city, state, country, postal_code,
-                location_timestamp, location_timestamp_dt,
-                device_name, platform, confidence,
-                activity_type, activity_confidence,
-                deleted_state, decoding_confidence, raw_xml, raw_json
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15,
-                      $16, $17, $18, $19, $20, $21, $22, $23, $24, $25, $26, $27, $28)
-        """, location_records)
 
+    async with get_db_connection() as conn:
+        # One transaction, so a failed chunk doesn't leave the upload half inserted
+        async with conn.transaction():
+            # Stream records to the server with one binary COPY per bounded chunk
+            for chunk in chunked(locations, COPY_CHUNK_SIZE):
+                await conn.copy_records_to_table(
+                    'locations',
+                    records=location_records(chunk),
+                    columns=_LOCATION_COLUMNS,
+                    timeout=60
+                )
+
+                # Let other tasks run between chunks
+                await asyncio.sleep(0)
+
+    _statistics_cache.invalidate(upload_id)
     logger.info(f"Bulk inserted {len(locations)} locations for upload_id: {upload_id}")
 
 
-async def get_location_extraction_status(upload_id: str) -> Optional[Dict[str, Any]]:
-    """Get the status of a location extraction job."""
+async def get_location_extraction_status(upload_id: str) -> Optional[asyncpg.Record]:
+    """Get the status of a location extraction job as a mapping-like Record."""
     async with get_db_connection() as conn:
-        row = await conn.fetchrow("""
+        return await conn.fetchrow("""
             SELECT * FROM location_extractions
             WHERE upload_id = $1
         """, upload_id)
 
-        if row:
-            return dict(row)
-        return None
+
+# Shared by get_locations and iter_locations. Unused filters are passed as
+# NULL so the statement text stays constant and asyncpg can reuse its
+# prepared statement across calls.
+_LOCATIONS_QUERY = """
+    SELECT * FROM locations
+    WHERE upload_id = $1
+      AND ($2::text IS NULL OR source_app = $2)
+      AND ($3::text IS NULL OR location_type = $3)
+      AND ($4::text IS NULL OR activity_type = $4)
+      AND ($5::double precision IS NULL OR latitude >= $5)
+      AND ($6::double precision IS NULL OR latitude <= $6)
+      AND ($7::double precision IS NULL OR longitude >= $7)
+      AND ($8::double precision IS NULL OR longitude <= $8)
+    ORDER BY location_timestamp_dt DESC
+    LIMIT $9 OFFSET $10
+"""
 
 
 async def get_locations(
@@ -174,133 +161,146 @@ async def get_locations(
     max_longitude: Optional[float] = None,
     limit: int = 100,
     offset: int = 0
-) -> List[Dict[str, Any]]:
+) -> List[asyncpg.Record]:
     """Get locations with optional filtering."""
-    query = "SELECT * FROM locations WHERE upload_id = $1"
-    params = [upload_id]
-    param_idx = 2
-
-    if source_app:
-        query += f" AND source_app = ${param_idx}"
-        params.append(source_app)
-        param_idx += 1
-
-    if location_type:
-        query += f" AND location_type = ${param_idx}"
-        params.append(location_type)
-        param_idx += 1
-
-    if activity_type:
-        query += f" AND activity_type = ${param_idx}"
-        params.append(activity_type)
-        param_idx += 1
-
-    if min_latitude is not None:
-        query += f" AND latitude >= ${param_idx}"
-        params.append(min_latitude)
-        param_idx += 1
-
-    if max_latitude is not None:
-        query += f" AND latitude <= ${param_idx}"
-        params.append(max_latitude)
-        param_idx += 1
-
-    if min_longitude is not None:
-        query += f" AND longitude >= ${param_idx}"
-        params.append(min_longitude)
-        param_idx += 1
-
-    if max_longitude is not None:
-        query += f" AND longitude <= ${param_idx}"
-        params.append(max_longitude)
-        param_idx += 1
-
-    query += f" ORDER BY location_timestamp_dt DESC LIMIT ${param_idx} OFFSET ${param_idx + 1}"
-    params.extend([limit, offset])
-
     async with get_db_connection() as conn:
-        rows = await conn.fetch(query, *params)
-        return [dict(row) for row in rows]
+        rows = await conn.fetch(
+            _LOCATIONS_QUERY,
+            upload_id,
+            source_app or None,
+            location_type or None,
+            activity_type or None,
+            min_latitude,
+            max_latitude,
+            min_longitude,
+            max_longitude,
+            limit,
+            offset
+        )
+        return rows
+
+
+async def iter_locations(
+    upload_id: str,
+    source_app: Optional[str] = None,
+    location_type: Optional[str] = None,
+    activity_type: Optional[str] = None,
+    min_latitude: Optional[float] = None,
+    max_latitude: Optional[float] = None,
+    min_longitude: Optional[float] = None,
+    max_longitude: Optional[float] = None,
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> AsyncIterator[asyncpg.Record]:
+    """Stream locations through a server-side cursor; use for large result sets."""
+    async with get_db_connection() as conn:
+        # Cursors only exist inside a transaction
+        async with conn.transaction():
+            async for row in conn.cursor(
+                _LOCATIONS_QUERY,
+                upload_id,
+                source_app or None,
+                location_type or None,
+                activity_type or None,
+                min_latitude,
+                max_latitude,
+                min_longitude,
+                max_longitude,
+                limit,
+                offset,
+                prefetch=CURSOR_PREFETCH
+            ):
+                yield row
 
 
 async def get_location_statistics(upload_id: str) -> Dict[str, Any]:
     """Get statistics about locations."""
-    async with get_db_connection() as conn:
-        # Total locations
-        total_locations = await conn.fetchval("""
-            SELECT COUNT(*) FROM locations
-            WHERE upload_id = $1
-        """, upload_id)
-
-        # Locations by app
-        app_stats = await conn.fetch("""
-            SELECT source_app, COUNT(*) as count
-            FROM locations
-            WHERE upload_id = $1
-            GROUP BY source_app
-            ORDER BY count DESC
-        """, upload_id)
-
-        # Locations by type
-        type_stats = await conn.fetch("""
-            SELECT location_type, COUNT(*) as count
+    cached = _statistics_cache.get(upload_id)
+    if cached is not None:
+        return cached
+
+    # All aggregates are computed server-side in one round-trip. The three
+    # breakdowns share a single GROUPING SETS pass over the upload's rows
+    # and come back as JSON arrays of {column, count} objects; the scalar
+    # totals share one more pass using FILTER clauses.
+    query = """
+        WITH l AS (
+            SELECT source_app, location_type, activity_type,
+                   latitude, longitude, location_timestamp_dt, address
             FROM locations
             WHERE upload_id = $1
-            GROUP BY location_type
-            ORDER BY count DESC
-        """, upload_id)
-
-        # Locations by activity
-        activity_stats = await conn.fetch("""
-            SELECT activity_type, COUNT(*) as count
-            FROM locations
-            WHERE upload_id = $1 AND activity_type IS NOT NULL
-            GROUP BY activity_type
-            ORDER BY count DESC
-        """, upload_id)
-
-        # Geographic bounds
-        bounds = await conn.fetchrow("""
+        ), g AS (
+            SELECT source_app, location_type, activity_type,
+                   GROUPING(source_app) AS g_app,
+                   GROUPING(location_type) AS g_type,
+                   GROUPING(activity_type) AS g_activity,
+                   COUNT(*) AS count
+            FROM l
+            GROUP BY GROUPING SETS ((source_app), (location_type), (activity_type))
+        )
+        SELECT
+            totals.total_locations,
+            (
+                SELECT COALESCE(json_agg(
+                    json_build_object('source_app', source_app, 'count', count)
+                    ORDER BY count DESC
+                ), '[]')
+                FROM g
+                WHERE g_app = 0
+            ) AS by_app,
+            (
+                SELECT COALESCE(json_agg(
+                    json_build_object('location_type', location_type, 'count', count)
+                    ORDER BY count DESC
+                ), '[]')
+                FROM g
+                WHERE g_type = 0
+            ) AS by_type,
+            (
+                SELECT COALESCE(json_agg(
+                    json_build_object('activity_type', activity_type, 'count', count)
+                    ORDER BY count DESC
+                ), '[]')
+                FROM g
+                WHERE g_activity = 0 AND activity_type IS NOT NULL
+            ) AS by_activity,
+            totals.min_lat, totals.max_lat, totals.min_lng, totals.max_lng,
+            totals.first_location, totals.last_location,
+            totals.with_address
+        FROM (
             SELECT
-                MIN(latitude) as min_lat,
-                MAX(latitude) as max_lat,
-                MIN(longitude) as min_lng,
-                MAX(longitude) as max_lng
-            FROM locations
-            WHERE upload_id = $1 AND latitude IS NOT NULL AND longitude IS NOT NULL
-        """, upload_id)
+                COUNT(*) AS total_locations,
+                MIN(latitude) FILTER (WHERE longitude IS NOT NULL) AS min_lat,
+                MAX(latitude) FILTER (WHERE longitude IS NOT NULL) AS max_lat,
+                MIN(longitude) FILTER (WHERE latitude IS NOT NULL) AS min_lng,
+                MAX(longitude) FILTER (WHERE latitude IS NOT NULL) AS max_lng,
+                MIN(location_timestamp_dt) AS first_location,
+                MAX(location_timestamp_dt) AS last_location,
+                COUNT(*) FILTER (WHERE address IS NOT NULL AND address != '') AS with_address
+            FROM l
+        ) totals
+    """
 
-        # Date range
-        date_range = await conn.fetchrow("""
-            SELECT
-                MIN(location_timestamp_dt) as first_location,
-                MAX(location_timestamp_dt) as last_location
-            FROM locations
-            WHERE upload_id = $1 AND location_timestamp_dt IS NOT NULL
-        """, upload_id)
-
-        # Locations with addresses
-        address_stats = await conn.fetchrow("""
-            SELECT
-                SUM(CASE WHEN address IS NOT NULL AND address != '' THEN 1 ELSE 0 END) as with_address,
-                SUM(CASE WHEN address IS NULL OR address = '' THEN 1 ELSE 0 END) as without_address
-            FROM locations
-            WHERE upload_id = $1
-        """, upload_id)
-
-        return {
-            'total_locations': total_locations,
-            'with_address': address_stats['with_address'] if address_stats else 0,
-            'without_address': address_stats['without_address'] if address_stats else 0,
-            'first_location_date': date_range['first_location'].isoformat() if date_range and date_range['first_location'] else None,
-            'last_location_date': date_range['last_location'].isoformat() if date_range and date_range['last_location'] else None,
+    async with get_db_connection() as conn:
+        row = await conn.fetchrow(query, upload_id)
+
+        statistics = {
+            'total_locations': row['total_locations'],
+            'with_address': row['with_address'],
+            # Every row either has an address or not, so no second count is needed
+            'without_address': row['total_locations'] - row['with_address'],
+            'first_location_date': row['first_location'].isoformat() if row['first_location'] else None,
+            'last_location_date': row['last_location'].isoformat() if row['last_location'] else None,
             'geographic_bounds': {
-                'min_latitude': float(bounds['min_lat']) if bounds and bounds['min_lat'] else None,
-                'max_latitude': float(bounds['max_lat']) if bounds and bounds['max_lat'] else None,
-                'min_longitude': float(bounds['min_lng']) if bounds and bounds['min_lng'] else None,
-                'max_longitude': float(bounds['max_lng']) if bounds and bounds['max_lng'] else None,
-            } if bounds else None,
-            'by_app': [dict(row) for row in app_stats],
-            'by_type': [dict(row) for row in type_stats],
-            'by_activity': [dict(row) for row in activity_stats],
+                'min_latitude': float(row['min_lat']) if row['min_lat'] else None,
+                'max_latitude': float(row['max_lat']) if row['max_lat'] else None,
+                'min_longitude': float(row['min_lng']) if row['min_lng'] else None,
+                'max_longitude': float(row['max_lng']) if row['max_lng'] else None,
+            },
+            'by_app': row['by_app'],
+            'by_type': row['by_type'],
+            'by_activity': row['by_activity'],
         }
+
+    _statistics_cache.set(upload_id, statistics)
+    return statistics
@@ -4,28 +4,72 @@ Database operations for instant messages extracted from UFDR files.
 This module provides async functions to interact with the messages tables.
 """
 
+import asyncio
 import asyncpg
-import os
-import json
-from typing import List, Dict, Any, Optional
+from typing import Iterable, List, Dict, Any, Optional
 import logging
+from datetime import datetime
+from operator import itemgetter
 from .connection import get_db_connection, get_db_pool
+from .helpers import chunked, load_schema_sql, COPY_CHUNK_SIZE
+from ..cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Per-upload statistics, invalidated whenever new messages are inserted
+_statistics_cache = TTLCache(maxsize=128, ttl=60)
+
+# Column order of the records passed to COPY in bulk_insert_messages
+_MESSAGE_COLUMNS = (
+    'id', 'upload_id', 'message_id', 'source_app', 'body', 'message_type', 'platform',
+    'message_timestamp', 'message_timestamp_dt',
+    'from_party_identifier', 'from_party_name', 'from_party_is_owner',
+    'to_party_identifier', 'to_party_name', 'to_party_is_owner',
+    'has_attachments', 'attachment_count',
+    'deleted_state', 'decoding_confidence', 'raw_xml', 'raw_json',
+)
+
+# Message keys already stored elsewhere: in a typed messages column, or as
+# rows of message_parties / message_attachments. raw_json keeps the rest.
+_MESSAGE_STORED_KEYS = frozenset(_MESSAGE_COLUMNS[2:-1] + ('parties', 'attachments'))
+
+# Columns returned by get_messages; the raw_xml/raw_json blobs are left to
+# get_message_detail so list pages stay small
+_MESSAGE_LIST_SELECT = ', '.join(_MESSAGE_COLUMNS[:-2] + ('created_at', 'updated_at'))
+
+_MESSAGE_PARTY_COLUMNS = (
+    'message_id', 'upload_id', 'party_identifier', 'party_name',
+    'party_role', 'is_phone_owner', 'raw_json',
+)
+
+_MESSAGE_ATTACHMENT_COLUMNS = (
+    'message_id', 'upload_id', 'attachment_type', 'filename',
+    'file_path', 'file_size', 'mime_type', 'raw_json',
+)
+
+# Source-dict keys for the columns between the ids and raw_json; records are
+# built by filling missing keys from the defaults and reading them all at once
+_MESSAGE_FIELDS = _MESSAGE_COLUMNS[2:-1]
+_MESSAGE_DEFAULTS = {
+    **dict.fromkeys(_MESSAGE_FIELDS),
+    'from_party_is_owner': False,
+    'to_party_is_owner': False,
+    'has_attachments': False,
+    'attachment_count': 0,
+}
+_message_fields = itemgetter(*_MESSAGE_FIELDS)
+
+_PARTY_DEFAULTS = {'identifier': None, 'name': None, 'role': None, 'is_phone_owner': False}
+_party_fields = itemgetter(*_PARTY_DEFAULTS)
+
+_ATTACHMENT_FIELDS = _MESSAGE_ATTACHMENT_COLUMNS[2:-1]
+_ATTACHMENT_DEFAULTS = dict.fromkeys(_ATTACHMENT_FIELDS)
+_attachment_fields = itemgetter(*_ATTACHMENT_FIELDS)
+
 
 async def init_messages_schema():
     """Initialize the messages database schema."""
-    schema_path = os.path.join(
-        os.path.dirname(__file__),
-        'messages_schema.sql'
-    )
-
-    if not os.path.exists(schema_path):
-        raise FileNotFoundError(f"Schema file not found: {schema_path}")
-
-    with open(schema_path, 'r') as f:
-        schema_sql = f.read()
+    schema_sql = load_schema_sql('messages_schema.sql')
 
     async with get_db_connection() as conn:
         await conn.execute(schema_sql)
@@ -54,163 +98,119 @@ async def update_message_extraction_status(
     error_message: Optional[str] = None
 ):
     """Update the status of a message extraction job."""
+    # Fields left as None keep their current value
     async with get_db_connection() as conn:
-        updates = ["extraction_status = $2", "updated_at = CURRENT_TIMESTAMP"]
-        params = [upload_id, status]
-        param_idx = 3
-
-        if total_messages is not None:
-            updates.append(f"total_messages = ${param_idx}")
-            params.append(total_messages)
-            param_idx += 1
-
-        if processed_messages is not None:
-            updates.append(f"processed_messages = ${param_idx}")
-            params.append(processed_messages)
-            param_idx += 1
-
-        if error_message is not None:
-            updates.append(f"error_message = ${param_idx}")
-            params.append(error_message)
-            param_idx += 1
-
-        query = f"""
+        await conn.execute("""
             UPDATE message_extractions
-            SET {', '.join(updates)}
+            SET extraction_status = $2,
+                total_messages = COALESCE($3, total_messages),
+                processed_messages = COALESCE($4, processed_messages),
+                error_message = COALESCE($5, error_message),
+                updated_at = CURRENT_TIMESTAMP
             WHERE upload_id = $1
-        """
-
-        await conn.execute(query, *params)
+        """, upload_id, status, total_messages, processed_messages, error_message)
 
     logger.info(f"Updated message extraction status for {upload_id}: {status}")
 
 
-async def bulk_insert_messages(upload_id: str, messages: List[Dict[str, Any]]):
-    """Bulk insert instant messages."""
-    if not messages:
-        return
+async def bulk_insert_messages(upload_id: str, messages: Iterable[Dict[str, Any]]):
+    """
+    Bulk insert instant messages.
 
-    async with get_db_connection() as conn:
-        # Prepare message records
-        message_records = []
-        party_records = []
-        attachment_records = []
-
-        for message in messages:
-            # Prepare raw_json by converting datetime to string
-            message_json = message.copy()
-            if message_json.get('message_timestamp_dt'):
-                message_json['message_timestamp_dt'] = message_json['message_timestamp_dt'].isoformat()
-
-            # Prepare main message record
-            record = (
-                upload_id,
-                message.get('message_id'),
-                message.get('source_app'),
-                message.get('body'),
-                message.get('message_type'),
-                message.get('platform'),
-                message.get('message_timestamp'),
-                message.get('message_timestamp_dt'),  # Keep as datetime for database
-                message.get('from_party_identifier'),
-                message.get('from_party_name'),
-                message.get('from_party_is_owner', False),
-                message.get('to_party_identifier'),
-                message.get('to_party_name'),
-                message.get('to_party_is_owner', False),
-                message.get('has_attachments', False),
-                message.get('attachment_count', 0),
-                message.get('deleted_state'),
-                message.get('decoding_confidence'),
-                message.get('raw_xml'),
-                json.dumps(message_json),  # raw_json with datetime converted to string
-            )
-            message_records.append(record)
-
-        # Insert messages
-        await conn.executemany("""
-            INSERT INTO messages (
-                upload_id, message_id, source_app, body, message_type, platform,
-                message_timestamp, message_timestamp_dt,
-                from_party_identifier, from_party_name, from_party_is_owner,
-                to_party_identifier, to_party_name, to_party_is_owner,
-                has_attachments, attachment_count,
-                deleted_state, decoding_confidence, raw_xml, raw_json
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20)
-        """, message_records)
-
-        # Get message IDs for inserted records
-        message_ids = await conn.fetch("""
-            SELECT id, message_id FROM messages
-            WHERE upload_id = $1 AND message_id = ANY($2)
-        """, upload_id, [msg['message_id'] for msg in messages])
-
-        message_id_map = {row['message_id']: row['id'] for row in message_ids}
-
-        # Prepare party records
-        for message in messages:
-            msg_id = message_id_map.get(message['message_id'])
-            if msg_id and message.get('parties'):
-                for party in message['parties']:
-                    party_records.append((
-                        msg_id,
-                        upload_id,
-                        party.get('identifier'),
-                        party.get('name'),
-                        party.get('role'),
-                        party.get('is_phone_owner', False),
-                        json.dumps(party),
-                    ))
+    messages may be any iterable (e.g. a generator); it is consumed in
+    bounded chunks so memory stays proportional to the chunk size.
+    """
+    inserted = 0
 
-        # Prepare attachment records
-        for message in messages:
-            msg_id = message_id_map.get(message['message_id'])
-            if msg_id and message.get('attachments'):
-                for attachment in message['attachments']:
-                    attachment_records.append((
-                        msg_id,
+    async with get_db_connection() as conn:
+        # Insert messages, parties and attachments atomically, each with one COPY per chunk
+        async with conn.transaction():
+            for chunk in chunked(messages, COPY_CHUNK_SIZE):
+                # Reserve message ids up front so parties and attachments can
+                # reference their parent without reading the ids back
+                message_db_ids = await conn.fetchval("""
+                    SELECT array_agg(nextval(pg_get_serial_sequence('messages', 'id')))
+                    FROM generate_series(1, $1)
+                """, len(chunk))
+
+                # Prepare message, party and attachment records in one pass
+                message_records = []
+                party_records = []
+                attachment_records = []
+
+                for message_db_id, message in zip(message_db_ids, chunk):
+                    message_records.append((
+                        message_db_id,
                         upload_id,
-                        attachment.get('attachment_type'),
-                        attachment.get('filename'),
-                        attachment.get('file_path'),
-                        attachment.get('file_size'),
-                        attachment.get('mime_type'),
-                        json.dumps(attachment),
+                        *_message_fields({**_MESSAGE_DEFAULTS, **message}),
+                        # raw_json: only fields without a home of their own (NULL if none)
+                        {k: v for k, v in message.items() if k not in _MESSAGE_STORED_KEYS} or None,
                     ))
 
-        # Insert parties
-        if party_records:
-            await conn.executemany("""
-                INSERT INTO message_parties (
-                    message_id, upload_id, party_identifier, party_name,
-                    party_role, is_phone_owner, raw_json
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7)
-            """, party_records)
-
-        # Insert attachments
-        if attachment_records:
-            await conn.executemany("""
-                INSERT INTO message_attachments (
-                    message_id, upload_id, attachment_type, filename,
-                    file_path, file_size, mime_type, raw_json
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-            """, attachment_records)
-
-    logger.info(f"Bulk inserted {len(messages)} messages for upload_id: {upload_id}")
-
-
-async def get_message_extraction_status(upload_id: str) -> Optional[Dict[str, Any]]:
-    """Get the status of a message extraction job."""
+                    party_records.extend(
+                        (
+                            message_db_id,
+                            upload_id,
+                            *_party_fields({**_PARTY_DEFAULTS, **party}),
+                            party
+                        )
+                        for party in message.get('parties') or []
+                    )
+
+                    attachment_records.extend(
+                        (
+                            message_db_id,
+                            upload_id,
+                            *_attachment_fields({**_ATTACHMENT_DEFAULTS, **attachment}),
+                            attachment
+                        )
+                        for attachment in message.get('attachments') or []
+                    )
+
+                await conn.copy_records_to_table(
+                    'messages',
+                    records=message_records,
+                    columns=_MESSAGE_COLUMNS
+                )
+
+                # Parties and attachments must stay on this connection: their
+                # foreign keys reference message rows that are not yet
+                # committed, so another pool connection could not see them
+
+                # Insert parties
+                if party_records:
+                    await conn.copy_records_to_table(
+                        'message_parties',
+                        records=party_records,
+                        columns=_MESSAGE_PARTY_COLUMNS
+                    )
+
+                # Insert attachments
+                if attachment_records:
+                    await conn.copy_records_to_table(
+                        'message_attachments',
+                        records=attachment_records,
+                        columns=_MESSAGE_ATTACHMENT_COLUMNS
+                    )
+
+                inserted += len(chunk)
+
+                # Let other tasks run between chunks
+                await asyncio.sleep(0)
+
+    if inserted:
+        _statistics_cache.invalidate(upload_id)
+        logger.info(f"Bulk inserted {inserted} messages for upload_id: {upload_id}")
+
+
+async def get_message_extraction_status(upload_id: str) -> Optional[asyncpg.Record]:
+    """Get the status of a message extraction job as a mapping-like Record."""
     async with get_db_connection() as conn:
-        row = await conn.fetchrow("""
+        return await conn.fetchrow("""
             SELECT * FROM message_extractions
             WHERE upload_id = $1
         """, upload_id)
 
-        if row:
-            return dict(row)
-        return None
-
 
 async def get_messages(
     upload_id: str,
@@ -219,10 +219,31 @@ async def get_messages(
     has_attachments: Optional[bool] = None,
     search_text: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
-) -> List[Dict[str, Any]]:
-    """Get messages with optional filtering."""
-    query = "SELECT * FROM messages WHERE upload_id = $1"
+    offset: int = 0,
+    before_timestamp: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    full_text: bool = False
+) -> List[asyncpg.Record]:
+    """
+    Get messages with optional filtering, newest first.
+
+    Rows carry every column except raw_xml and raw_json; use
+    get_message_detail to fetch a single message with its raw data.
+
+    search_text is a case-insensitive substring match by default. With
+    full_text=True it is parsed as a web-style search query (words, "quoted
+    phrases", -excluded words) and matched against the body's English
+    full-text index instead.
+
+    For deep pagination pass the message_timestamp_dt and id of the last row
+    of the previous page as before_timestamp/before_id instead of an offset;
+    the next page then starts right after it without scanning skipped rows.
+    before_id alone continues past a row without a timestamp.
+    """
+    if before_timestamp is not None and before_id is None:
+        raise ValueError("before_timestamp requires before_id")
+
+    query = f"SELECT {_MESSAGE_LIST_SELECT} FROM messages WHERE upload_id = $1"
     params = [upload_id]
     param_idx = 2
 
@@ -241,72 +262,120 @@ async def get_messages(
         params.append(has_attachments)
         param_idx += 1
 
-    if search_text:
+    if search_text and full_text:
+        # Same expression as idx_messages_body_text so the GIN index is used
+        query += f" AND to_tsvector('english', body) @@ websearch_to_tsquery('english', ${param_idx})"
+        params.append(search_text)
+        param_idx += 1
+    elif search_text:
         query += f" AND body ILIKE ${param_idx}"
         params.append(f'%{search_text}%')
         param_idx += 1
 
-    query += f" ORDER BY message_timestamp_dt DESC LIMIT ${param_idx} OFFSET ${param_idx + 1}"
+    if before_id is not None:
+        # Keyset cursor; rows without a timestamp sort first (DESC puts NULLs first)
+        if before_timestamp is not None:
+            query += (
+                f" AND (message_timestamp_dt < ${param_idx}"
+                f" OR (message_timestamp_dt = ${param_idx} AND id < ${param_idx + 1}))"
+            )
+            params.extend([before_timestamp, before_id])
+            param_idx += 2
+        else:
+            query += (
+                f" AND (message_timestamp_dt IS NOT NULL"
+                f" OR id < ${param_idx})"
+            )
+            params.append(before_id)
+            param_idx += 1
+
+    query += f" ORDER BY message_timestamp_dt DESC, id DESC LIMIT ${param_idx} OFFSET ${param_idx + 1}"
     params.extend([limit, offset])
 
     async with get_db_connection() as conn:
-        rows = await conn.fetch(query, *params)
-        return [dict(row) for row in rows]
+        return await conn.fetch(query, *params)
 
 
-async def get_message_statistics(upload_id: str) -> Dict[str, Any]:
-    """Get statistics about messages."""
+async def get_message_detail(upload_id: str, message_db_id: int) -> Optional[asyncpg.Record]:
+    """Get a single message by its database id, including raw_xml and raw_json."""
     async with get_db_connection() as conn:
-        # Total messages
-        total_messages = await conn.fetchval("""
-            SELECT COUNT(*) FROM messages
-            WHERE upload_id = $1
-        """, upload_id)
+        return await conn.fetchrow("""
+            SELECT * FROM messages
+            WHERE upload_id = $1 AND id = $2
+        """, upload_id, message_db_id)
 
-        # Messages by app
-        app_stats = await conn.fetch("""
-            SELECT source_app, COUNT(*) as count
-            FROM messages
-            WHERE upload_id = $1
-            GROUP BY source_app
-            ORDER BY count DESC
-        """, upload_id)
-
-        # Messages by type
-        type_stats = await conn.fetch("""
-            SELECT message_type, COUNT(*) as count
-            FROM messages
-            WHERE upload_id = $1
-            GROUP BY message_type
-            ORDER BY count DESC
-        """, upload_id)
 
-        # Messages with attachments
-        attachment_stats = await conn.fetchrow("""
-            SELECT
-                SUM(CASE WHEN has_attachments THEN 1 ELSE 0 END) as with_attachments,
-                SUM(CASE WHEN NOT has_attachments THEN 1 ELSE 0 END) as without_attachments,
-                SUM(attachment_count) as total_attachments
+async def get_message_statistics(upload_id: str) -> Dict[str, Any]:
+    """Get statistics about messages."""
+    cached = _statistics_cache.get(upload_id)
+    if cached is not None:
+        return cached
+
+    # All aggregates are computed server-side in one round-trip. Both
+    # breakdowns share a single GROUPING SETS pass over the upload's rows
+    # and come back as JSON arrays of {column, count} objects; the scalar
+    # totals share one more pass using FILTER clauses.
+    query = """
+        WITH m AS (
+            SELECT source_app, message_type, has_attachments,
+                   attachment_count, message_timestamp_dt
             FROM messages
             WHERE upload_id = $1
-        """, upload_id)
-
-        # Date range
-        date_range = await conn.fetchrow("""
+        ), g AS (
+            SELECT source_app, message_type,
+                   GROUPING(source_app) AS g_app,
+                   COUNT(*) AS count
+            FROM m
+            GROUP BY GROUPING SETS ((source_app), (message_type))
+        )
+        SELECT
+            totals.total_messages,
+            totals.with_attachments,
+            totals.without_attachments,
+            totals.total_attachments,
+            totals.first_message,
+            totals.last_message,
+            (
+                SELECT COALESCE(json_agg(
+                    json_build_object('source_app', source_app, 'count', count)
+                    ORDER BY count DESC
+                ), '[]')
+                FROM g
+                WHERE g_app = 0
+            ) AS by_app,
+            (
+                SELECT COALESCE(json_agg(
+                    json_build_object('message_type', message_type, 'count', count)
+                    ORDER BY count DESC
+                ), '[]')
+                FROM g
+                WHERE g_app = 1
+            ) AS by_type
+        FROM (
             SELECT
-                MIN(message_timestamp_dt) as first_message,
-                MAX(message_timestamp_dt) as last_message
-            FROM messages
-            WHERE upload_id = $1 AND message_timestamp_dt IS NOT NULL
-        """, upload_id)
+                COUNT(*) AS total_messages,
+                COUNT(*) FILTER (WHERE has_attachments) AS with_attachments,
+                COUNT(*) FILTER (WHERE NOT has_attachments) AS without_attachments,
+                SUM(attachment_count) AS total_attachments,
+                MIN(message_timestamp_dt) AS first_message,
+                MAX(message_timestamp_dt) AS last_message
+            FROM m
+        ) totals
+    """
 
-        return {
-            'total_messages': total_messages,
-            'with_attachments': attachment_stats['with_attachments'] if attachment_stats else 0,
-            'without_attachments': attachment_stats['without_attachments'] if attachment_stats else 0,
-            'total_attachments': attachment_stats['total_attachments'] if attachment_stats else 0,
-            'first_message_date': date_range['first_message'].isoformat() if date_range and date_range['first_message'] else None,
-            'last_message_date': date_range['last_message'].isoformat() if date_range and date_range['last_message'] else None,
-            'by_app': [dict(row) for row in app_stats],
-            'by_type': [dict(row) for row in type_stats],
+    async with get_db_connection() as conn:
+        row = await conn.fetchrow(query, upload_id)
+
+        statistics = {
+            'total_messages': row['total_messages'],
+            'with_attachments': row['with_attachments'],
+            'without_attachments': row['without_attachments'],
+            'total_attachments': row['total_attachments'],
+            'first_message_date': row['first_message'].isoformat() if row['first_message'] else None,
+            'last_message_date': row['last_message'].isoformat() if row['last_message'] else None,
+            'by_app': row['by_app'],
+            'by_type': row['by_type'],
         }
+
+    _statistics_cache.set(upload_id, statistics)
+    return statistics
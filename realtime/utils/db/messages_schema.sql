@@ -3,6 +3,9 @@
 -- Author: UFDR-Agent Team
 -- Date: 2025-12-09
 
+-- Trigram operators for substring (ILIKE '%...%') search indexes
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- Drop existing tables if they exist
 DROP TABLE IF EXISTS message_attachments CASCADE;
 DROP TABLE IF EXISTS message_parties CASCADE;
@@ -119,10 +122,13 @@ CREATE INDEX idx_messages_source_app ON messages(source_app);
 CREATE INDEX idx_messages_message_type ON messages(message_type);
 CREATE INDEX idx_messages_timestamp ON messages(message_timestamp);
 CREATE INDEX idx_messages_timestamp_dt ON messages(message_timestamp_dt);
+CREATE INDEX idx_messages_upload_timestamp_id ON messages(upload_id, message_timestamp_dt DESC, id DESC)
+    INCLUDE (source_app, message_type, has_attachments); -- get_messages ordering/keyset pagination, covering its filters
 CREATE INDEX idx_messages_from_party ON messages(from_party_identifier);
 CREATE INDEX idx_messages_to_party ON messages(to_party_identifier);
 CREATE INDEX idx_messages_has_attachments ON messages(has_attachments);
 CREATE INDEX idx_messages_body_text ON messages USING GIN (to_tsvector('english', body));
+CREATE INDEX idx_messages_body_trgm ON messages USING GIN (body gin_trgm_ops); -- get_messages body ILIKE search
 
 CREATE INDEX idx_message_parties_message_id ON message_parties(message_id);
 CREATE INDEX idx_message_parties_upload_id ON message_parties(upload_id);
@@ -164,5 +170,5 @@ COMMENT ON COLUMN messages.body IS 'Message text content';
 COMMENT ON COLUMN messages.message_type IS 'AppMessage, SMS, MMS, etc.';
 COMMENT ON COLUMN messages.message_timestamp IS 'Message time in milliseconds since epoch';
 COMMENT ON COLUMN messages.has_attachments IS 'TRUE if message has file attachments';
-COMMENT ON COLUMN messages.raw_xml IS 'Original XML from UFDR report.xml';
-COMMENT ON COLUMN messages.raw_json IS 'Complete parsed data as JSON';
+COMMENT ON COLUMN messages.raw_xml IS 'Original XML from UFDR report.xml; the full message record';
+COMMENT ON COLUMN messages.raw_json IS 'Parsed fields with no messages column or child-table row of their own (NULL if none); not the full record, see raw_xml';
@@ -1,11 +1,51 @@
 import asyncpg
-from typing import Optional, Dict, Any
+import orjson
+from typing import Optional, Dict, Any, List
 import logging
 from datetime import datetime, timezone
 from .connection import get_db_connection
 
 logger = logging.getLogger(__name__)
 
+# Column order of the records passed to COPY in save_feedback_batch
+_FEEDBACK_COLUMNS = ('session_id', 'email_id', 'timestamp', 'query', 'generatedpayload', 'response')
+
+# Kept as a constant so every call sends byte-identical SQL and asyncpg's
+# per-connection statement cache reuses the prepared statement
+_INSERT_FEEDBACK_SQL = """
+    INSERT INTO feedback (session_id, email_id, timestamp, query, generatedpayload, response)
+    VALUES ($1, $2, $3, $4, $5, $6)
+"""
+
+
+def _feedback_select(include_payload: bool) -> str:
+    """Column list for the feedback getters; generatedpayload only on request."""
+    if include_payload:
+        return 'session_id, email_id, timestamp, query, generatedpayload, response'
+    return 'session_id, email_id, timestamp, query, response'
+
+
+# Serialized forms of the payloads feedback most often carries, so those skip the encoder
+_NULL_PAYLOAD_JSON = 'null'
+_EMPTY_PAYLOAD_JSON = '{}'
+
+
+def _encode_payload(payload) -> str:
+    """Serialize a generated payload to JSON text for the generatedpayload column."""
+    if payload is None:
+        return _NULL_PAYLOAD_JSON
+    if not payload and type(payload) is dict:
+        return _EMPTY_PAYLOAD_JSON
+    return orjson.dumps(payload).decode()
+
+
+def _parse_timestamp(timestamp):
+    """Convert an ISO format timestamp string (e.g. "2025-12-08T09:27:41Z") to a datetime."""
+    if isinstance(timestamp, str):
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    return timestamp
+
+
 async def save_feedback(
     session_id: Optional[str],
     email_id: Optional[str],
@@ -31,22 +71,14 @@ async def save_feedback(
     try:
         async with get_db_connection() as conn:
             # Convert the generated_payload dict to JSON string for storage
-            import json
-            payload_json = json.dumps(generated_payload)
+            payload_json = _encode_payload(generated_payload)
 
             # Convert timestamp string to datetime object if it's a string
-            if isinstance(timestamp, str):
-                # Parse ISO format timestamp (e.g., "2025-12-08T09:27:41Z")
-                timestamp_dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            else:
-                timestamp_dt = timestamp
+            timestamp_dt = _parse_timestamp(timestamp)
 
             # Insert the feedback record
             await conn.execute(
-                """
-                INSERT INTO feedback (session_id, email_id, timestamp, query, generatedpayload, response)
-                VALUES ($1, $2, $3, $4, $5, $6)
-                """,
+                _INSERT_FEEDBACK_SQL,
                 session_id,
                 email_id,
                 timestamp_dt,
@@ -62,12 +94,62 @@ async def save_feedback(
         logger.error(f"Failed to save feedback: {str(e)}", exc_info=True)
         return False
 
-async def get_feedback_by_session(session_id: str) -> list:
+async def save_feedback_batch(feedback_items: List[Dict[str, Any]]) -> bool:
+    """
+    Save many feedback records to the feedback table with a single COPY.
+
+    Args:
+        feedback_items: Dicts with the same keys as the save_feedback arguments
+            (session_id, email_id, timestamp, query, generated_payload, response)
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if not feedback_items:
+        return True
+
+    try:
+        records = [
+            (
+                item.get('session_id'),
+                item.get('email_id'),
+                _parse_timestamp(item.get('timestamp')),
+                item.get('query'),
+                _encode_payload(item.get('generated_payload')),
+                item.get('response'),
+            )
+            for item in feedback_items
+        ]
+
+        async with get_db_connection() as conn:
+            await conn.copy_records_to_table(
+                'feedback',
+                records=records,
+                columns=_FEEDBACK_COLUMNS
+            )
+
+        logger.info(f"Saved {len(records)} feedback records")
+        return True
+
+    except Exception as e:
+        logger.error(f"Failed to save feedback batch: {str(e)}", exc_info=True)
+        return False
+
+async def get_feedback_by_session(
+    session_id: str,
+    include_payload: bool = False,
+    limit: int = 100,
+    before: Optional[datetime] = None
+) -> list:
     """
-    Retrieve feedback records by session_id.
+    Retrieve feedback records by session_id, newest first.
 
     Args:
         session_id: Session identifier
+        include_payload: Also return the (potentially large) generatedpayload column
+        limit: Maximum number of records to return
+        before: Only return records older than this timestamp; pass the
+            timestamp of the last record of the previous page to page back
 
     Returns:
         list: List of feedback records
@@ -75,13 +157,17 @@ async def get_feedback_by_session(session_id: str) -> list:
     try:
         async with get_db_connection() as conn:
             rows = await conn.fetch(
-                """
-                SELECT session_id, email_id, timestamp, query, generatedpayload, response
+                f"""
+                SELECT {_feedback_select(include_payload)}
                 FROM feedback
                 WHERE session_id = $1
+                  AND ($2::timestamptz IS NULL OR timestamp < $2)
                 ORDER BY timestamp DESC
+                LIMIT $3
                 """,
-                session_id
+                session_id,
+                before,
+                limit
             )
 
             return [dict(row) for row in rows]
@@ -90,12 +176,21 @@ async def get_feedback_by_session(session_id: str) -> list:
         logger.error(f"Failed to retrieve feedback: {str(e)}", exc_info=True)
         return []
 
-async def get_feedback_by_email(email_id: str) -> list:
+async def get_feedback_by_email(
+    email_id: str,
+    include_payload: bool = False,
+    limit: int = 100,
+    before: Optional[datetime] = None
+) -> list:
     """
-    Retrieve feedback records by email_id.
+    Retrieve feedback records by email_id, newest first.
 
     Args:
         email_id: Email identifier
+        include_payload: Also return the (potentially large) generatedpayload column
+        limit: Maximum number of records to return
+        before: Only return records older than this timestamp; pass the
+            timestamp of the last record of the previous page to page back
 
     Returns:
         list: List of feedback records
@@ -103,13 +198,17 @@ async def get_feedback_by_email(email_id: str) -> list:
     try:
         async with get_db_connection() as conn:
             rows = await conn.fetch(
-                """
-                SELECT session_id, email_id, timestamp, query, generatedpayload, response
+                f"""
+                SELECT {_feedback_select(include_payload)}
                 FROM feedback
                 WHERE email_id = $1
+                  AND ($2::timestamptz IS NULL OR timestamp < $2)
                 ORDER BY timestamp DESC
+                LIMIT $3
                 """,
-                email_id
+                email_id,
+                before,
+                limit
             )
 
             return [dict(row) for row in rows]
@@ -0,0 +1,59 @@
+"""
+Loader for the prompt texts stored alongside this package.
+"""
+
+import os
+from functools import lru_cache
+
+
+def canonicalize(text: str) -> str:
+    """
+    Normalize prompt text so it is byte-identical wherever it was edited.
+
+    Uses LF line endings, drops trailing whitespace on every line and
+    leading/trailing blank lines, and ends the text with one newline.
+    Provider prompt caches match prefixes byte for byte, so stray
+    whitespace differences would otherwise cost cache hits.
+    """
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).strip('\n') + '\n'
+
+
+@lru_cache(maxsize=None)
+def load_prompt(filename: str) -> str:
+    """
+    Read a prompt file from this package once and keep its canonicalized
+    contents in memory.
+    """
+    prompt_path = os.path.join(os.path.dirname(__file__), filename)
+
+    if not os.path.exists(prompt_path):
+        raise FileNotFoundError(f"Prompt file not found: {prompt_path}")
+
+    with open(prompt_path, 'r', encoding='utf-8', newline='') as f:
+        return canonicalize(f.read())
+
+
+def render_tool_prompt(title: str, sections: str, examples: str) -> str:
+    """
+    Fill the tool guide template (tool_prompt.md) shared by all agent tools.
+
+    The template holds the parts common to every tool: the parameter
+    description and the common mistakes. title is the tool's own heading,
+    sections its text between the parameters and the common mistakes, and
+    examples its query examples, which end the guide.
+    """
+    return canonicalize(
+        load_prompt('tool_prompt.md').format(title=title, sections=sections, examples=examples)
+    )
+
+
+@lru_cache(maxsize=None)
+def load_tool_prompt(filename: str) -> str:
+    """
+    Render the tool guide in filename, whose first line is its title and
+    whose "## Query Examples" section comes last.
+    """
+    title, text = load_prompt(filename).split('\n\n', 1)
+    examples_start = text.index('## Query Examples')
+    return render_tool_prompt(title, text[:examples_start].rstrip('\n'), text[examples_start:])
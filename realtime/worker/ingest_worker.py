@@ -20,6 +20,11 @@ import redis
 import asyncio
 import inspect
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Load envs
 S3_ENDPOINT = os.getenv("S3_ENDPOINT", "http://localhost:9000")
 S3_REGION = os.getenv("S3_REGION", "us-east-1")
@@ -186,7 +191,10 @@ def _run_ufdr_extractions(upload_id: str, ufdr_path: str, job_progress_key: str)
         print("[worker] Starting Location extraction...")
         try:
             locations_extractor = UFDRLocationsExtractor(ufdr_path, upload_id)
-            await locations_extractor.extract_and_load(locations_operations)
+            await locations_extractor.extract_and_load(
+                locations_operations,
+                progress_callback=lambda n: _hset_progress(job_progress_key, {"locations_processed": n})
+            )
             print("[worker] Location extraction completed successfully")
             _hset_progress(job_progress_key, {"locations_extracted": "true"})
         except Exception as e:
@@ -208,15 +216,18 @@ def _run_ufdr_extractions(upload_id: str, ufdr_path: str, job_progress_key: str)
         print("[worker] Starting Contacts extraction...")
         try:
             contacts_extractor = UFDRContactsExtractor(ufdr_path, upload_id)
-            await contacts_extractor.extract_and_load(contacts_operations)
+            await contacts_extractor.extract_and_load(
+                contacts_operations,
+                progress_callback=lambda n: _hset_progress(job_progress_key, {"contacts_processed": n})
+            )
             print("[worker] Contacts extraction completed successfully")
             _hset_progress(job_progress_key, {"status": "done", "contacts_extracted": "true"})
         except Exception as e:
             print(f"[worker] Contacts extraction failed: {e}")
             _hset_progress(job_progress_key, {"contacts_error": str(e)})
 
-    # Run all extractions in a single event loop
-    loop = asyncio.new_event_loop()
+    # Run all extractions in a single event loop (uvloop when installed)
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
 
     try:
@@ -13,7 +13,7 @@ import tempfile
 import shutil
 import zipfile
 import xml.etree.ElementTree as ET
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 import logging
 import asyncio
 from datetime import datetime
@@ -309,12 +309,19 @@ class UFDRContactsExtractor:
             except Exception as e:
                 logger.error(f"Error cleaning up temp directory: {e}")
 
-    async def extract_and_load(self, db_operations_module):
+    async def extract_and_load(
+        self,
+        db_operations_module,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ):
         """
         Main extraction and loading pipeline.
 
         Args:
             db_operations_module: The contacts_operations module for DB operations
+            progress_callback: Optional callable receiving the processed contact count
+                after each batch; per-batch progress is reported through it instead
+                of a status UPDATE, which is written once when the job completes
         """
         try:
             # Extract report.xml
@@ -360,8 +367,8 @@ class UFDRContactsExtractor:
                 total_entries=total_entries
             )
 
-            # Insert contacts in batches
-            batch_size = 20
+            # Insert contacts in batches; each batch is a single COPY pair
+            batch_size = 1000
             processed = 0
 
             for i in range(0, len(contacts), batch_size):
@@ -369,12 +376,9 @@ class UFDRContactsExtractor:
                 await db_operations_module.bulk_insert_contacts(self.upload_id, batch)
                 processed += len(batch)
 
-                # Update progress
-                await db_operations_module.update_contact_extraction_status(
-                    self.upload_id,
-                    'processing',
-                    processed_contacts=processed
-                )
+                # Report progress without a status UPDATE per batch
+                if progress_callback:
+                    progress_callback(processed)
 
                 logger.info(f"Processed {processed}/{len(contacts)} contacts")
 
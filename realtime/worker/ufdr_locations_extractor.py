@@ -13,7 +13,7 @@ import tempfile
 import shutil
 import zipfile
 import xml.etree.ElementTree as ET
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 import logging
 import asyncio
 from datetime import datetime
@@ -321,12 +321,19 @@ class UFDRLocationsExtractor:
             except Exception as e:
                 logger.error(f"Error cleaning up temp directory: {e}")
 
-    async def extract_and_load(self, db_operations_module):
+    async def extract_and_load(
+        self,
+        db_operations_module,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ):
         """
         Main extraction and loading pipeline.
 
         Args:
             db_operations_module: The locations_operations module for DB operations
+            progress_callback: Optional callable receiving the processed location count
+                after each batch; per-batch progress is reported through it instead
+                of a status UPDATE, which is written once when the job completes
         """
         try:
             # Extract report.xml
@@ -375,12 +382,9 @@ class UFDRLocationsExtractor:
                 await db_operations_module.bulk_insert_locations(self.upload_id, batch)
                 processed += len(batch)
 
-                # Update progress
-                await db_operations_module.update_location_extraction_status(
-                    self.upload_id,
-                    'processing',
-                    processed_locations=processed
-                )
+                # Report progress without a status UPDATE per batch
+                if progress_callback:
+                    progress_callback(processed)
 
                 logger.info(f"Processed {processed}/{len(locations)} locations")
 